@@ -0,0 +1,109 @@
+"""Async versions of the DSP endpoints for ASGI deployments.
+
+Under ASGI, Django runs every synchronous view on one shared thread, so a
+single long filter blocks all other requests. The views here run the
+existing DRF views on a bounded thread pool instead: NumPy and SciPy release
+the GIL, the pool threads share the process's sample and result caches, and
+the event loop stays free to accept and stream other requests. Request
+bodies (uploads included) are read by the ASGI handler without blocking the
+loop before the view runs; multipart parsing and the store writes happen on
+the pool.
+
+Each process admits at most ``ASYNC_MAX_PENDING`` running or queued requests;
+past that, requests are answered 429 with a Retry-After header at once
+instead of queueing without bound.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+
+from . import live, views
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.ASYNC_MAX_PENDING)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_WORKERS,
+                                           thread_name_prefix="dsp")
+        return _executor
+
+
+def _busy_response():
+    response = JsonResponse({"error": "Server is busy; retry shortly."}, status=429)
+    response["Retry-After"] = str(settings.ASYNC_RETRY_AFTER)
+    return response
+
+
+def _run_view(view, request, args, kwargs):
+    response = view(request, *args, **kwargs)
+    # DRF responses are rendered lazily; encode the JSON here, off the loop
+    if hasattr(response, "render") and callable(response.render):
+        response.render()
+    return response
+
+
+async def _iter_off_loop(chunks):
+    # Sync streaming bodies would be read into memory in one go by Django's
+    # ASGI handler; pulling them a chunk at a time keeps them streamed
+    loop = asyncio.get_running_loop()
+    iterator = iter(chunks)
+    end = object()
+    while True:
+        chunk = await loop.run_in_executor(get_executor(), next, iterator, end)
+        if chunk is end:
+            break
+        yield chunk
+
+
+def offloaded(view):
+    """Async view running the synchronous ``view`` on the DSP thread pool."""
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if not _slots.acquire(blocking=False):
+            return _busy_response()
+        try:
+            # copy the context so profiling spans reach this request
+            context = contextvars.copy_context()
+            future = get_executor().submit(context.run, _run_view, view, request, args, kwargs)
+        except BaseException:
+            _slots.release()
+            raise
+        # released when the view finishes, or if it is cancelled before it starts
+        future.add_done_callback(lambda f: _slots.release())
+        response = await asyncio.wrap_future(future)
+        if response.streaming and not response.is_async and isinstance(request, ASGIRequest):
+            response.streaming_content = _iter_off_loop(response.streaming_content)
+        return response
+    return async_view
+
+
+upload_audio = offloaded(views.upload_audio)
+apply_filter = offloaded(views.apply_filter)
+apply_filter_batch = offloaded(views.apply_filter_batch)
+plot_waveform = offloaded(views.plot_waveform)
+get_audio_file = offloaded(views.get_audio_file)
+stream_filtered_audio = offloaded(views.stream_filtered_audio)
+get_plot_data = offloaded(views.get_plot_data)
+get_spectrum = offloaded(views.get_spectrum)
+filter_sweep = offloaded(views.filter_sweep)
+waveform_window = offloaded(views.waveform_window)
+spectrogram = offloaded(views.spectrogram)
+
+
+async def live_session_events(request, session_id):
+    """views.live_session_events, waiting for events on the loop instead of a thread."""
+    session = live.get(str(session_id))
+    if session is None:
+        return JsonResponse({"error": "Session not found."}, status=404)
+    return views.live_event_stream(session.aiter_events(settings.LIVE_KEEPALIVE))
@@ -0,0 +1,82 @@
+"""Background execution of analysis jobs on a local process pool.
+
+Job state lives in the database (api.models.Job); the futures themselves are
+only known to the web process that submitted them, so cancelling a job that
+is already running marks it cancelled and discards its result rather than
+killing the worker.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import Job
+from .storage import result_cache
+from .tasks import run_job
+
+_executor = None
+_executor_lock = threading.Lock()
+_futures = {}
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn keeps the workers free of the web process's threads and
+            # open database connections
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def submit(kind, audio_id, audio_path, params):
+    job = Job.objects.create(kind=kind, audio_id=audio_id, params=params)
+    future = get_executor().submit(
+        run_job, kind, audio_id, audio_path, params, result_cache,
+        settings.AUDIO_PROCESSING_DTYPE)
+    _futures[job.id] = future
+    future.add_done_callback(lambda f, job_id=job.id: _finish(job_id, f))
+    return job
+
+
+def _finish(job_id, future):
+    # Runs on the executor's management thread once the worker returns
+    _futures.pop(job_id, None)
+    try:
+        if future.cancelled():
+            return
+        error = future.exception()
+        pending = Job.objects.filter(pk=job_id).exclude(status=Job.Status.CANCELLED)
+        if error is None:
+            pending.update(status=Job.Status.DONE, result=future.result())
+        else:
+            logging.error("Job %s failed: %s", job_id, error)
+            pending.update(status=Job.Status.FAILED, error=str(error))
+    finally:
+        close_old_connections()
+
+
+def refresh(job):
+    # The pool does not report when a job starts, so ask the local future
+    future = _futures.get(job.id)
+    if job.status == Job.Status.PENDING and future is not None and future.running():
+        Job.objects.filter(pk=job.id, status=Job.Status.PENDING).update(
+            status=Job.Status.RUNNING)
+        job.refresh_from_db()
+    return job
+
+
+def cancel(job):
+    if job.finished:
+        return job
+    future = _futures.pop(job.id, None)
+    if future is not None:
+        future.cancel()
+    Job.objects.filter(pk=job.id).update(status=Job.Status.CANCELLED)
+    job.refresh_from_db()
+    return job
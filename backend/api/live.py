@@ -0,0 +1,234 @@
+"""Live filter sessions streaming progressive plot updates as server-sent events.
+
+A session keeps one recording's samples, and a ladder of decimated copies of
+them, resident in this process. Every parameter update starts a new
+generation: the session's worker thread filters the coarsest copy first, so
+a preview is sent within milliseconds, then refines level by level up to the
+full-resolution result. Work for a generation stops at its next check once
+newer parameters arrive, and its undelivered events are dropped.
+
+Sessions live in the process that created them, so deployments with several
+processes need sticky routing, and they close after LIVE_SESSION_TTL seconds
+without updates or a connected event stream.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+from django.conf import settings
+
+from signaltools.audio_analyzer import PlotData
+from signaltools.progressive import decimation_ladder, progressive_filter
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class SessionLimitReached(Exception):
+    pass
+
+
+def _sse(event, payload, event_id=None):
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {event}", f"data: {json.dumps(payload)}"]
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class LiveSession:
+    def __init__(self, audio_id, analyzer, channel=None, max_points=2000, method="minmax",
+                 encoding="json"):
+        self.id = str(uuid.uuid4())
+        self.audio_id = audio_id
+        self.analyzer = analyzer
+        self.channel = channel
+        self.max_points = max_points
+        self.method = method
+        self.encoding = encoding
+        self.generation = 0
+        self.params = None
+        self.closed = False
+        self.streaming = False
+        self.last_used = time.monotonic()
+        self._cond = threading.Condition()
+        # (generation, encoded event) waiting for the event stream
+        self._events = deque()
+        # callbacks run whenever an event is queued (async event streams)
+        self.wakeups = []
+        self._worker = threading.Thread(target=self._run, name=f"live-{self.id[:8]}", daemon=True)
+        self._worker.start()
+
+    # --- Parameters ---
+
+    def update(self, params):
+        """Start a new generation for ``params``; returns its number."""
+        with self._cond:
+            self.generation += 1
+            self.params = params
+            self.last_used = time.monotonic()
+            self._cond.notify_all()
+            return self.generation
+
+    def close(self):
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+            self._cond.notify_all()
+        self._publish(self.generation, _sse("close", {"session_id": self.id}))
+        with _sessions_lock:
+            _sessions.pop(self.id, None)
+
+    # --- Events ---
+
+    def _publish(self, generation, event):
+        with self._cond:
+            # superseded previews are not worth sending any more
+            while self._events and self._events[0][0] < generation:
+                self._events.popleft()
+            self._events.append((generation, event))
+            self._cond.notify_all()
+            wakeups = list(self.wakeups)
+        for wake in wakeups:
+            wake()
+
+    def iter_events(self, keepalive):
+        """Encoded events for one consumer, with keep-alive comments while idle."""
+        self.streaming = True
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._events or self.closed, timeout=keepalive)
+                    self.last_used = time.monotonic()
+                    if self._events:
+                        event = self._events.popleft()[1]
+                    elif self.closed:
+                        return
+                    else:
+                        event = b": keepalive\n\n"
+                yield event
+        finally:
+            self.streaming = False
+
+    async def aiter_events(self, keepalive):
+        """iter_events for async views: waits on the event loop, not on a thread."""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def wake():
+            loop.call_soon_threadsafe(ready.set)
+
+        with self._cond:
+            self.wakeups.append(wake)
+        self.streaming = True
+        try:
+            while True:
+                ready.clear()
+                with self._cond:
+                    self.last_used = time.monotonic()
+                    event = self._events.popleft()[1] if self._events else None
+                    closed = self.closed
+                if event is not None:
+                    yield event
+                    continue
+                if closed:
+                    return
+                try:
+                    await asyncio.wait_for(ready.wait(), keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            self.streaming = False
+            with self._cond:
+                self.wakeups.remove(wake)
+
+    # --- Worker ---
+
+    def _run(self):
+        try:
+            analyzer = self.analyzer
+            x = analyzer.to_processing(analyzer.channel_data(self.channel))
+            levels = decimation_ladder(x, analyzer.sr)
+            done = 0
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self.closed or self.generation != done,
+                                        timeout=settings.LIVE_SESSION_TTL)
+                    if self.closed:
+                        return
+                    generation, params = self.generation, self.params
+                    idle = time.monotonic() - self.last_used
+                if generation == done:
+                    if not self.streaming and idle >= settings.LIVE_SESSION_TTL:
+                        logging.info("Closing idle live session %s", self.id)
+                        self.close()
+                        return
+                    continue
+                self._refine(generation, params, levels)
+                done = generation
+        except Exception as e:
+            logging.error("Live session %s failed: %s", self.id, e)
+            # not "error", which EventSource also fires for connection errors
+            self._publish(self.generation, _sse("failed", {"error": str(e)}))
+            self.close()
+
+    def _refine(self, generation, params, levels):
+        analyzer = self.analyzer
+        start = time.perf_counter()
+        try:
+            spec = analyzer.design_filter(params["filter_type"], params["order"], params["cutoff"],
+                                          params["design"], params["phase"])
+            freqs, h = spec.frequency_response()
+            response = PlotData(x_axis=freqs, y_axis=np.abs(h), x_label="Frequency (Hz)",
+                                y_label="Magnitude",
+                                title=f"{spec.filter_type} pass filter response")
+            title = (f"Order: {spec.order} {spec.filter_type.capitalize()} Pass Filter "
+                     "- Time Domain Response")
+            stages = progressive_filter(
+                levels, params["filter_type"], params["order"], params["cutoff"],
+                params["design"], params["phase"], dtype=analyzer.precision,
+                cancelled=lambda: self.generation != generation or self.closed,
+                excerpts=self.max_points // 2)
+            for stage, refinement in enumerate(stages):
+                filtered_plot = PlotData(x_axis=refinement.times, y_axis=refinement.filtered,
+                                         x_label="Time (seconds)", y_label="Amplitude", title=title)
+                plot_data = {"filter_time_domain_response": filtered_plot.to_chartjs(
+                    self.max_points, self.method, self.encoding)}
+                if stage == 0:
+                    # exact at any level, so only sent with the first preview
+                    plot_data["filter_frequency_response"] = response.to_chartjs(
+                        self.max_points, self.method, self.encoding)
+                payload = {
+                    "generation": generation,
+                    "stage": stage,
+                    # "decimated", "excerpts" or "full"
+                    "kind": refinement.kind,
+                    "decimation": refinement.decimation,
+                    "final": refinement.kind == "full",
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "plot_data": plot_data
+                }
+                self._publish(generation, _sse(
+                    "result" if refinement.kind == "full" else "preview", payload,
+                    event_id=f"{generation}.{stage}"))
+        except ValueError as e:
+            self._publish(generation, _sse("failed", {"generation": generation, "error": str(e)}))
+
+
+def create(audio_id, analyzer, **options):
+    with _sessions_lock:
+        if len(_sessions) >= settings.LIVE_MAX_SESSIONS:
+            raise SessionLimitReached(
+                f"At most {settings.LIVE_MAX_SESSIONS} live sessions per process")
+        session = LiveSession(audio_id, analyzer, **options)
+        _sessions[session.id] = session
+    return session
+
+
+def get(session_id):
+    with _sessions_lock:
+        return _sessions.get(session_id)
@@ -0,0 +1,79 @@
+import functools
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from signaltools.profiling import collect, enable_memory_tracing, server_timing, span
+
+
+class ProfilingMiddleware:
+    """Time each request and its response rendering.
+
+    The spans of a request, including its view (see timed_view) and the
+    AudioAnalyzer and AudioStore stages it ran, are reported in a
+    Server-Timing header and recorded in the metrics registry served by the
+    metrics view. Works under both WSGI and ASGI; in async mode no hook hops
+    to the thread shared by sync views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            self.process_template_response = self._aprocess_template_response
+        if settings.PROFILE_MEMORY:
+            enable_memory_tracing()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with collect() as spans:
+            with span("request"):
+                response = self.get_response(request)
+        response["Server-Timing"] = server_timing(spans)
+        return response
+
+    async def __acall__(self, request):
+        with collect() as spans:
+            with span("request"):
+                response = await self.get_response(request)
+        response["Server-Timing"] = server_timing(spans)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered lazily; render here to time JSON encoding
+        with span("render"):
+            response.render()
+        return response
+
+    async def _aprocess_template_response(self, request, response):
+        # the async views render on their worker thread already
+        if not getattr(response, "is_rendered", False):
+            with span("render"):
+                await sync_to_async(response.render, thread_sensitive=True)()
+        return response
+
+
+def timed_view(view, name=None):
+    """``view`` run in a ``view.<name>`` span, excluding middleware and rendering.
+
+    urls.py wraps every route's view with it. Django still calls the view
+    itself, so atomic requests, its response checks and other middleware's
+    process_exception all apply as usual.
+    """
+    span_name = f"view.{name or view.__name__}"
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def timed(request, *args, **kwargs):
+            with span(span_name):
+                return await view(request, *args, **kwargs)
+        return timed
+
+    @functools.wraps(view)
+    def timed(request, *args, **kwargs):
+        with span(span_name):
+            return view(request, *args, **kwargs)
+    return timed
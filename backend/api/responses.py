@@ -0,0 +1,104 @@
+"""Conditional and byte-range HTTP responses for audio downloads."""
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def quote_etag(value):
+    return f'"{value}"'
+
+
+def parse_range(header, size):
+    """``(start, stop)`` of a single ``bytes=`` range, None to send everything.
+
+    Raises ValueError for a range that cannot be satisfied. Multi-range
+    requests are answered with the whole file, which HTTP allows.
+    """
+    match = RANGE_PATTERN.match((header or "").strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # suffix range: the last N bytes
+        start, stop = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        stop = min(int(last) + 1, size) if last else size
+    if start >= size or start >= stop:
+        raise ValueError(f"Range not satisfiable for {size} bytes")
+    return start, stop
+
+
+def _iter_file_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request, path, content_type, etag):
+    """Serve ``path`` with ETag/Last-Modified validation and Range support.
+
+    Answers 304 when the client's copy is current, 206 for a single byte
+    range (honouring If-Range), 416 for an unsatisfiable range and 200
+    with the whole file otherwise.
+    """
+    stat = os.stat(path)
+    etag = quote_etag(etag)
+    last_modified = int(stat.st_mtime)
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        return conditional
+
+    size = stat.st_size
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    else:
+        start, stop = byte_range
+        response = StreamingHttpResponse(
+            _iter_file_range(path, start, stop - start), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        response["Content-Length"] = str(stop - start)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def streaming_audio_response(request, chunks, size, etag, last_modified):
+    """Stream generated WAV bytes, or 304 if the client already has them.
+
+    ``chunks`` is only consumed when the response is sent, so a 304 costs
+    no computation.
+    """
+    etag = quote_etag(etag)
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        return conditional
+    response = StreamingHttpResponse(chunks, content_type="audio/wav")
+    response["Content-Length"] = str(size)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # produced front to back, so byte ranges are not offered
+    response["Accept-Ranges"] = "none"
+    return response
@@ -0,0 +1,14 @@
+from django.conf import settings
+
+from signaltools.audio_store import AudioStore
+from signaltools.result_cache import ResultCache
+
+# One store per worker process so decoded samples are shared across requests
+audio_store = AudioStore(settings.AUDIO_STORE_ROOT,
+                         max_cache_bytes=settings.AUDIO_CACHE_MAX_BYTES,
+                         max_tile_bytes=settings.SPECTROGRAM_CACHE_MAX_BYTES,
+                         precision=settings.AUDIO_PROCESSING_DTYPE)
+
+# filtered files and plot data, shared with the job workers
+result_cache = ResultCache(settings.RESULT_CACHE_ROOT, settings.RESULT_CACHE_URL,
+                           max_bytes=settings.RESULT_CACHE_MAX_BYTES)
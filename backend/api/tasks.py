@@ -0,0 +1,195 @@
+"""DSP work shared by the synchronous views and the background job workers.
+
+Nothing here touches Django models, so the functions can run inside the
+process pool used by api.jobs. Filtered files and plot data are kept in a
+ResultCache under names derived from the source audio id and the canonical
+request parameters, so repeating a request reuses the earlier result.
+"""
+import os
+
+import numpy as np
+
+from signaltools.audio_analyzer import AudioAnalyzer
+from signaltools.batch import filter_files
+from signaltools.encoding import encode_array, encode_axis
+from signaltools.filters import design_filter
+from signaltools.result_cache import result_key
+from signaltools.spectrum import DEFAULT_SEGMENT
+from signaltools.sweep import sweep
+from signaltools.wavinfo import read_wav_info
+
+
+def _download_name(base_name, spec, sample_rate=None):
+    # Human-readable name offered to clients saving a filtered file
+    cutoff_str = (
+        "-".join(map(str, spec.cutoff))
+        if isinstance(spec.cutoff, tuple)
+        else str(spec.cutoff)
+    )
+    design_str = "" if spec.design == "butter" else f"_{spec.design}"
+    phase_str = "" if spec.phase == "causal" else f"_{spec.phase}phase"
+    rate_str = "" if sample_rate is None else f"_{sample_rate}sps"
+    return f"{base_name}_{spec.filter_type}_{cutoff_str}Hz{design_str}{phase_str}{rate_str}.wav"
+
+
+def _spec_key(spec):
+    return (spec.filter_type, spec.order, spec.cutoff, spec.design, spec.phase)
+
+
+def filter_result_key(audio_id, spec, precision=None, sample_rate=None):
+    """Content hash of a filtered output: the source audio id plus the
+    canonical filter parameters, processing precision and, when resampled,
+    the output sample rate."""
+    rate = () if sample_rate is None else (int(sample_rate),)
+    return result_key(audio_id, *_spec_key(spec), str(precision), *rate)
+
+
+def filter_audio(analyzer, audio_id, filter_type, order, cutoff, results, base_name,
+                 design="butter", phase="causal", sample_rate=None):
+    """Filter the analyzer's audio into the result cache, unless it is there already.
+
+    With ``sample_rate`` the filtered audio is saved resampled to that rate.
+    """
+    spec = analyzer.design_filter(filter_type, order, cutoff, design, phase)
+    name = f"{filter_result_key(audio_id, spec, analyzer.precision, sample_rate)}.wav"
+    cached = results.lookup(name) is not None
+    if not cached:
+        # defer=True: the filter is streamed to disk block by block on save
+        analyzer.apply_filter(spec, defer=True)
+        results.store(name, lambda path: analyzer.save_audio_file(
+            use_filtered=True, output_filename=path, sample_rate=sample_rate))
+
+    download_url = results.url(name)
+    return {
+        "message": f"{filter_type} pass filter applied",
+        "filter_file": name,
+        "download_name": _download_name(base_name, spec, sample_rate),
+        "download_url": download_url,
+        "filtered_audio_url": download_url,
+        "cached": cached,
+    }
+
+
+def filter_audio_batch(audio_ids, audio_paths, base_names, filter_type, order, cutoff, results,
+                       precision=None, design="butter", phase="causal"):
+    """Filter several files with one design, channels of equal-length files batched.
+
+    Files whose result is already cached are skipped.
+    """
+    specs = [design_filter(filter_type, order, cutoff, read_wav_info(path).sr, design, phase)
+             for path in audio_paths]
+    names = [f"{filter_result_key(audio_id, spec, precision)}.wav"
+             for audio_id, spec in zip(audio_ids, specs)]
+    # the same audio may be listed twice; filter it once
+    missing = {name: path for name, path in zip(names, audio_paths)
+               if results.lookup(name) is None}
+    if missing:
+        temp_paths = [results.temp_path() for _ in missing]
+        try:
+            filter_files(filter_type, order, cutoff, list(missing.values()), temp_paths,
+                         precision=precision, design=design, phase=phase)
+        except Exception:
+            for path in temp_paths:
+                os.remove(path)
+            raise
+        for name, temp_path in zip(missing, temp_paths):
+            results.commit(name, temp_path)
+    return {
+        "message": f"{filter_type} pass filter applied to {len(audio_paths)} files",
+        "files": [
+            {"filter_file": name,
+             "download_name": _download_name(base_name, spec),
+             "download_url": results.url(name),
+             "cached": name not in missing}
+            for name, base_name, spec in zip(names, base_names, specs)
+        ],
+    }
+
+
+def compute_plot_data(analyzer, filter_type, order, cutoff, method="minmax", encoding="json",
+                      channel=None, design="butter", phase="causal", results=None, audio_id=None,
+                      sample_rate=None):
+    """Frequency, impulse and time-domain responses in chart.js form.
+
+    With ``sample_rate`` the time-domain response is computed on the audio
+    resampled to that rate. With a result cache and the audio id, the
+    payload is cached as JSON.
+    """
+    if results is not None and audio_id is not None:
+        spec = analyzer.design_filter(filter_type, order, cutoff, design, phase)
+        rate = () if sample_rate is None else (int(sample_rate),)
+        name = "{}.json".format(result_key(
+            "plot_data", audio_id, *_spec_key(spec), method, encoding, channel,
+            str(analyzer.precision), *rate))
+        cached = results.get_json(name)
+        if cached is not None:
+            return cached
+        return results.put_json(name, compute_plot_data(
+            analyzer, filter_type, order, cutoff, method, encoding, channel, design, phase,
+            sample_rate=sample_rate))
+
+    analyzer.display_filter_frequency_response(
+        filter_type=filter_type, order=order, cutoff=cutoff, design=design, phase=phase)
+    analyzer.display_filter_impulse_response(
+        filter_type=filter_type, order=order, cutoff=cutoff, design=design, phase=phase)
+    analyzer.display_filtered_audio(
+        filter_type=filter_type, order=order, cutoff=cutoff, channel=channel,
+        design=design, phase=phase, sample_rate=sample_rate)
+    return {"plot_data": analyzer.get_chartjs_data(method=method, encoding=encoding)}
+
+
+def compute_spectrum(analyzer, spectrum_method="rfft", nperseg=DEFAULT_SEGMENT, scale="linear",
+                     method="minmax", encoding="json", channel=None, max_points=2000):
+    """Magnitude spectrum in chart.js form, downsampled like the other plots."""
+    analyzer.display_dtft_magnitude(
+        display=False, method=spectrum_method, nperseg=nperseg, scale=scale, channel=channel)
+    plot = analyzer.plot_data["magnitude_spectrum"]
+    return {
+        "plot_data": {"magnitude_spectrum": plot.to_chartjs(max_points, method, encoding)},
+        "sample_rate": analyzer.sr
+    }
+
+
+def compute_sweep(analyzer, filters, worN=512, encoding="json", max_duration=None,
+                  workers=None):
+    """Frequency responses and metrics for many filter settings at once.
+
+    ``filters`` is a list of dicts with filter_type, order, cutoff and
+    optionally design and phase. Time-domain metrics use the first
+    ``max_duration`` seconds of the mix-down (all of it when None).
+    """
+    specs = [analyzer.design_filter(f["filter_type"], f["order"], f["cutoff"],
+                                    f.get("design", "butter"), f.get("phase", "causal"))
+             for f in filters]
+    x = analyzer.channel_data()
+    if max_duration is not None:
+        x = x[:int(max_duration * analyzer.sr)]
+    x = analyzer.to_processing(x)
+    if x.dtype.kind != "f":
+        # raw integer samples when no processing precision is configured
+        x = x.astype(np.float64)
+    freqs, magnitudes_db, metrics = sweep(specs, x, worN=worN, workers=workers)
+    encode = encode_array if encoding == "base64" else (lambda values: values.tolist())
+    return {
+        "sample_rate": analyzer.sr,
+        "frequencies": encode_axis(freqs) if encoding == "base64" else freqs.tolist(),
+        "results": [
+            {
+                "filter": {"filter_type": spec.filter_type, "order": spec.order,
+                           "cutoff": spec.cutoff, "design": spec.design, "phase": spec.phase},
+                "magnitude_db": encode(magnitude_db),
+                "metrics": result_metrics,
+            }
+            for spec, magnitude_db, result_metrics in zip(specs, magnitudes_db, metrics)
+        ],
+    }
+
+
+def run_job(kind, audio_id, audio_path, params, results, precision=None):
+    # Entry point inside a worker process: map the file and run the task
+    analyzer = AudioAnalyzer(audio_path, mmap=True, precision=precision)
+    if kind == "filter":
+        return filter_audio(analyzer, audio_id, results=results, **params)
+    if kind == "plot_data":
+        return compute_plot_data(analyzer, results=results, audio_id=audio_id, **params)
+    raise ValueError(f"Unknown job kind: {kind}")
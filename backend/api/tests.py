@@ -1,3 +1,209 @@
-from django.test import TestCase
+import io
+import json
+import struct
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+import numpy as np
+import scipy.io.wavfile
+import scipy.signal
+from django.test import RequestFactory, SimpleTestCase
+
+from benchmarks.bench_downsample import loop_peak_preserving_downsample
+from signaltools.audio_analyzer import PlotData
+from signaltools.audio_store import AudioStore
+from signaltools.pyramid import MinMaxPyramid
+from signaltools.resample import StreamingResampler
+from signaltools.streaming import iter_blocks, stream_sosfilt
+from signaltools.wavinfo import WavStreamParser, read_wav_info
+
+from .responses import ranged_file_response
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Cold-start budget for importing the API in a fresh interpreter (seconds).
+# NumPy and scipy.signal dominate this; GUI and audio-device modules must
+# not be on the import path at all.
+IMPORT_TIME_BUDGET = 3.0
+OPTIONAL_MODULES = ("matplotlib", "matplotlib.pyplot", "sounddevice")
+
+IMPORT_PROBE = """
+import json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+start = time.perf_counter()
+import django
+django.setup()
+import api.urls
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+""" % (OPTIONAL_MODULES,)
+
+
+class ImportTimeTests(SimpleTestCase):
+    def probe(self):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_api_import_skips_optional_modules(self):
+        self.assertEqual(self.probe()["loaded"], [])
+
+    def test_api_import_within_budget(self):
+        # best of three to keep the measurement stable on a busy machine
+        seconds = min(self.probe()["seconds"] for _ in range(3))
+        self.assertLess(seconds, IMPORT_TIME_BUDGET,
+                        f"Importing the API took {seconds:.2f}s")
+
+
+class RangedFileResponseTests(SimpleTestCase):
+    def setUp(self):
+        self.body = bytes(range(256)) * 4
+        f = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+        with f:
+            f.write(self.body)
+        self.addCleanup(Path(f.name).unlink)
+        self.path = f.name
+
+    def get(self, **headers):
+        request = RequestFactory().get("/", headers=headers)
+        return ranged_file_response(request, self.path, "audio/wav", "abc")
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"abc"')
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+
+    def test_byte_range(self):
+        for header, start, stop in (("bytes=10-19", 10, 20), ("bytes=1000-", 1000, 1024),
+                                    ("bytes=-4", 1020, 1024), ("bytes=1020-5000", 1020, 1024)):
+            with self.subTest(header=header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{stop - 1}/1024")
+                self.assertEqual(b"".join(response.streaming_content), self.body[start:stop])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range="bytes=1024-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.get(Range="bytes=10-19", If_Range='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_matching_etag_is_not_modified(self):
+        self.assertEqual(self.get(If_None_Match='"abc"').status_code, 304)
+        self.assertEqual(self.get(If_None_Match='"old"').status_code, 200)
+
+
+class AudioDownloadTests(SimpleTestCase):
+    def test_filename_cannot_leave_media_root(self):
+        for name in ("/etc/passwd", "../manage.py", "../../../../etc/passwd",
+                     "results/../../manage.py", "..", "a\x00b"):
+            with self.subTest(name=name):
+                response = self.client.get("/api/get_audio/", {"filename": name})
+                self.assertEqual(response.status_code, 404)
+
+
+class PyramidWindowTests(SimpleTestCase):
+    def test_window_outside_the_signal_is_empty(self):
+        pyramid = MinMaxPyramid(np.random.default_rng(0).standard_normal(100000))
+        for start, stop in ((-40000, -8000), (200000, 300000), (5000, 3000)):
+            with self.subTest(start=start, stop=stop):
+                mins = pyramid.window(start, stop, 100)[3]
+                self.assertEqual(len(mins), 0)
+
+
+class StreamSosfiltTests(SimpleTestCase):
+    def test_matches_one_shot_sosfilt_across_block_boundaries(self):
+        y = np.random.default_rng(0).standard_normal((10007, 2))
+        sos = scipy.signal.butter(6, (300, 3000), btype="band", fs=44100, output="sos")
+        expected = scipy.signal.sosfilt(sos, y, axis=0)
+        for block_size in (1, 97, 4096, len(y)):
+            with self.subTest(block_size=block_size):
+                blocks = stream_sosfilt(sos, iter_blocks(y, block_size))
+                np.testing.assert_array_equal(np.concatenate(list(blocks)), expected)
+
+
+class MinMaxDownsampleTests(SimpleTestCase):
+    def test_matches_the_per_bucket_loop(self):
+        rng = np.random.default_rng(0)
+        # integer samples give ties within buckets; odd lengths a partial last bucket
+        for n, y in ((100003, rng.standard_normal(100003)),
+                     (50001, rng.integers(-3, 4, 50001).astype(float)),
+                     (4000, np.zeros(4000))):
+            with self.subTest(n=n):
+                x = np.arange(n) / 8000
+                expected = loop_peak_preserving_downsample(x, y, 2000)
+                actual = PlotData(x_axis=x, y_axis=y).downsample(2000, "minmax")
+                np.testing.assert_array_equal(actual[0], expected[0])
+                np.testing.assert_array_equal(actual[1], expected[1])
+
+
+class StreamingResamplerTests(SimpleTestCase):
+    def test_matches_resample_poly(self):
+        y = np.random.default_rng(0).standard_normal((5003, 2))
+        for up, down in ((1, 1), (1, 8), (2, 1), (147, 160), (160, 147), (3, 7)):
+            expected = scipy.signal.resample_poly(y, up, down, axis=0)
+            for block_size in (1, 333, 4096, len(y)):
+                with self.subTest(up=up, down=down, block_size=block_size):
+                    resampler = StreamingResampler(up, down)
+                    out = np.concatenate(list(resampler.stream(iter_blocks(y, block_size))))
+                    self.assertEqual(out.shape, expected.shape)
+                    np.testing.assert_allclose(out, expected, rtol=0, atol=1e-12)
+
+
+def wav_bytes(y, sr):
+    # scipy's WAV with an odd-sized chunk (and its pad byte) before "fmt "
+    f = io.BytesIO()
+    scipy.io.wavfile.write(f, sr, y)
+    data = f.getvalue()
+    return data[:12] + b"LIST" + struct.pack("<I", 5) + b"abcde\x00" + data[12:]
+
+
+def split(data, sizes):
+    # data cut into pieces of the given sizes, repeated until it is used up
+    pieces, start = [], 0
+    for size in sizes * (len(data) // sum(sizes) + 1):
+        pieces.append(data[start:start + size])
+        start += size
+    return [piece for piece in pieces if piece]
+
+
+class WavIngestTests(SimpleTestCase):
+    SPLITS = ([1], [3, 7], [5, 4096, 1], [65536], [10 ** 9])
+
+    def setUp(self):
+        self.y = (np.random.default_rng(0).standard_normal((20011, 2)) * 8000).astype(np.int16)
+        self.data = wav_bytes(self.y, 8000)
+
+    def test_stream_parser_matches_read_wav_info(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = Path(root) / "a.wav"
+            path.write_bytes(self.data)
+            expected = read_wav_info(path)
+        for sizes in self.SPLITS:
+            with self.subTest(sizes=sizes):
+                parser = WavStreamParser()
+                samples = b"".join(parser.feed(piece) for piece in split(self.data, sizes))
+                self.assertEqual(parser.finish(), expected)
+                self.assertEqual(samples, self.y.tobytes())
+
+    def test_ingest_envelope_matches_the_pyramid(self):
+        expected = MinMaxPyramid(self.y).levels[0]
+        for sizes in self.SPLITS:
+            with self.subTest(sizes=sizes), tempfile.TemporaryDirectory() as root:
+                store = AudioStore(root)
+                ingest = store.ingest()
+                for piece in split(self.data, sizes):
+                    ingest.write(piece)
+                audio_id = ingest.commit()
+                self.assertIn(audio_id, store.pyramids)
+                mins, maxs = store.pyramids.get(audio_id).levels[0]
+                np.testing.assert_array_equal(mins, expected[0])
+                np.testing.assert_array_equal(maxs, expected[1])
@@ -0,0 +1,71 @@
+import io
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from signaltools.audio_store import InvalidAudio
+
+from .storage import audio_store
+
+# form field carrying audio in the API's multipart requests
+AUDIO_FIELD = "file"
+
+
+class StoredAudioUpload(UploadedFile):
+    """An uploaded file that is already in the audio store as ``audio_id``."""
+
+    def __init__(self, audio_id, name, content_type, size, charset, content_type_extra=None):
+        super().__init__(open(audio_store.path(audio_id), "rb"), name, content_type,
+                         size, charset, content_type_extra)
+        self.audio_id = audio_id
+
+
+class RejectedAudioUpload(UploadedFile):
+    """An uploaded file the audio store refused; ``error`` says why."""
+
+    def __init__(self, error, name, content_type, size, charset, content_type_extra=None):
+        super().__init__(io.BytesIO(), name, content_type, size, charset, content_type_extra)
+        self.error = error
+
+
+class AudioStoreUploadHandler(FileUploadHandler):
+    """Write the audio field of an upload straight into the audio store.
+
+    Django's default handlers spool an upload to memory or a temporary file,
+    which the view then copies into the store and reads back to analyse.
+    This handler streams the chunks into the store as they arrive, hashing
+    the bytes and building the waveform envelope on the way (see
+    AudioIngest). Other fields are left to the default handlers.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.ingest = None
+        if field_name != AUDIO_FIELD:
+            return
+        self.ingest = audio_store.ingest()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.ingest is None:
+            return raw_data
+        self.ingest.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.ingest is None:
+            return None
+        ingest, self.ingest = self.ingest, None
+        try:
+            audio_id = ingest.commit()
+        except InvalidAudio as e:
+            # the view answers 400; raising here would end the whole request
+            return RejectedAudioUpload(e, self.file_name, self.content_type, file_size,
+                                       self.charset, self.content_type_extra)
+        return StoredAudioUpload(audio_id, self.file_name, self.content_type, file_size,
+                                 self.charset, self.content_type_extra)
+
+    def upload_interrupted(self):
+        if getattr(self, "ingest", None) is not None:
+            self.ingest.abort()
+            self.ingest = None
@@ -14,14 +14,40 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from . import views
+from .middleware import timed_view
+
+if settings.ASYNC_VIEWS:
+    from . import async_views as dsp_views
+else:
+    dsp_views = views
 
 urlpatterns = [
-    path("upload/", views.upload_audio, name="upload-audio"),
-    path("filter/", views.apply_filter, name="apply-filter"),
-    path("plot_waveform/", views.plot_waveform, name="plot-waveform"),
-    path("get_audio/", views.get_audio_file, name="get-audio"),
-    path("get_plot_data/", views.get_plot_data, name="get-plot-data")
+    path("upload/", dsp_views.upload_audio, name="upload-audio"),
+    path("filter/", dsp_views.apply_filter, name="apply-filter"),
+    path("filter_batch/", dsp_views.apply_filter_batch, name="apply-filter-batch"),
+    path("plot_waveform/", dsp_views.plot_waveform, name="plot-waveform"),
+    path("get_audio/", dsp_views.get_audio_file, name="get-audio"),
+    path("filtered_audio/", dsp_views.stream_filtered_audio, name="stream-filtered-audio"),
+    path("get_plot_data/", dsp_views.get_plot_data, name="get-plot-data"),
+    path("spectrum/", dsp_views.get_spectrum, name="get-spectrum"),
+    path("sweep/", dsp_views.filter_sweep, name="filter-sweep"),
+    path("waveform_window/", dsp_views.waveform_window, name="waveform-window"),
+    path("spectrogram/", dsp_views.spectrogram, name="spectrogram"),
+    path("metrics/", views.metrics, name="metrics"),
+    path("live/", views.create_live_session, name="create-live-session"),
+    path("live/<uuid:session_id>/", views.close_live_session, name="close-live-session"),
+    path("live/<uuid:session_id>/params/", views.update_live_session, name="update-live-session"),
+    path("live/<uuid:session_id>/events/", dsp_views.live_session_events, name="live-session-events"),
+    path("jobs/", views.submit_job, name="submit-job"),
+    path("jobs/<uuid:job_id>/", views.job_status, name="job-status"),
+    path("jobs/<uuid:job_id>/result/", views.job_result, name="job-result"),
+    path("jobs/<uuid:job_id>/cancel/", views.cancel_job, name="cancel-job")
 ]
+
+# each view runs in a "view.<url name>" profiling span
+for pattern in urlpatterns:
+    pattern.callback = timed_view(pattern.callback, pattern.name)
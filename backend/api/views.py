@@ -1,29 +1,152 @@
-from datetime import datetime
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.http import FileResponse
-from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+import itertools
 import os
-from signaltools.audio_analyzer import AudioAnalyzer
 from django.conf import settings
+from signaltools.audio_store import InvalidAudio
+from signaltools.downsample import DOWNSAMPLE_METHODS
+from signaltools.encoding import PAYLOAD_ENCODINGS, encode_array
+from signaltools.filters import design_filter, normalize_design_params, normalize_filter_params
+from signaltools.profiling import registry
+from signaltools.resample import rate_factors
+from signaltools.spectrogram import TILE_FRAMES, SpectrogramParams
+from signaltools.spectrum import DEFAULT_SEGMENT, SPECTRUM_METHODS, SPECTRUM_SCALES
+from signaltools.streaming import filtered_wav_size
+from .models import Job
+from .responses import ranged_file_response, streaming_audio_response
+from .storage import audio_store, result_cache
+from .tasks import (compute_plot_data, compute_spectrum, compute_sweep, filter_audio,
+                    filter_audio_batch, filter_result_key)
+from . import jobs, live
+
+# Upper bound on the pixel width a waveform window request may ask for
+MAX_WINDOW_WIDTH = 10000
+# Upper bound on either side of a rendered waveform image
+MAX_IMAGE_SIZE = 4000
+# Upper bound on the spectrogram tiles returned by one request
+MAX_SPECTROGRAM_TILES = 32
+# Upper bound on the points of a downsampled plot
+MAX_PLOT_POINTS = 20000
+# Upper bound on the filter settings compared by one sweep request
+MAX_SWEEP_FILTERS = 64
+# Time-domain sweep metrics use at most this much audio (seconds)
+SWEEP_MAX_DURATION = 60.0
+
+
+def _load_analyzer(request):
+    """Resolve the request's audio from an ``audio_id`` or an uploaded ``file``.
+
+    Returns ``(audio_id, analyzer)``, or ``(None, None)`` when neither is given.
+    Raises KeyError for an unknown audio id.
+    """
+    audio_id = request.data.get("audio_id") or request.GET.get("audio_id")
+    if not audio_id:
+        file = request.FILES.get("file")
+        if file is None:
+            return None, None
+        audio_id = _store_upload(file)
+    return audio_id, audio_store.load(audio_id)
+
+
+def _store_upload(file):
+    # AudioStoreUploadHandler has normally stored (or rejected) the file while
+    # receiving it; raises InvalidAudio for files that are not WAVs
+    error = getattr(file, "error", None)
+    if error is not None:
+        raise error
+    return getattr(file, "audio_id", None) or audio_store.save(file)
+
+
+def _envelope_payload(audio_id, info, start, end, width):
+    # Min/max waveform envelope of [start, end) seconds at ~width points
+    level, bucket, first, mins, maxs = audio_store.pyramid(audio_id).window(
+        start * info.sr, end * info.sr, width)
+    return {
+        "level": level,
+        "samples_per_point": bucket,
+        "start": first / info.sr,
+        "step": bucket / info.sr,
+        "min": mins.tolist(),
+        "max": maxs.tolist()
+    }
+
+
+def _media_file(filename):
+    """Path of a file served by name: a cached result or a file under MEDIA_ROOT.
+
+    Returns None for names that resolve outside MEDIA_ROOT (absolute paths,
+    ``..``) or to something other than a regular file.
+    """
+    try:
+        # cached filter results first (a hit also refreshes their LRU age)
+        path = result_cache.lookup(os.path.basename(filename)) or \
+            os.path.join(settings.MEDIA_ROOT, filename)
+        root = os.path.realpath(settings.MEDIA_ROOT)
+        path = os.path.realpath(path)
+    except ValueError:
+        # e.g. an embedded NUL byte
+        return None
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _missing_audio_response():
+    return Response({"error": "Provide either an audio_id or a file."}, status=400)
+
+
+def _filtered_audio_response(request, audio_id, analyzer, spec, sample_rate=None):
+    """Stream the filtered WAV as it is produced; 304 if the client has it.
+
+    The ETag hashes the source audio id with the filter parameters (and
+    output sample rate), so it is known before any filtering happens. A
+    result already in the cache is served from disk with byte-range
+    support instead.
+    """
+    etag = filter_result_key(audio_id, spec, analyzer.precision, sample_rate)
+    cached = result_cache.lookup(f"{etag}.wav")
+    if cached is not None:
+        return ranged_file_response(request, cached, "audio/wav", etag)
+    analyzer.apply_filter(spec, defer=True)
+    last_modified = int(os.path.getmtime(audio_store.path(audio_id)))
+    return streaming_audio_response(
+        request, analyzer.iter_filtered_wav(sample_rate=sample_rate),
+        filtered_wav_size(analyzer.y, analyzer.output_dtype, analyzer.sr, sample_rate),
+        etag, last_modified)
 
 
 @api_view(["POST"])
 def upload_audio(request):
     file = request.FILES.get("file")
-    path = default_storage.save(file.name, file)
-    full_path = default_storage.path(path)
+    if file is None:
+        return Response({"error": "File is required."}, status=400)
+    try:
+        # optional waveform overview of the whole file, this many points wide
+        preview_width = int(request.data.get("preview_width", 0))
+    except ValueError:
+        return Response({"error": "preview_width must be an integer"}, status=400)
+    if not 0 <= preview_width <= MAX_WINDOW_WIDTH:
+        return Response({"error": f"preview_width must be between 0 and {MAX_WINDOW_WIDTH}"}, status=400)
 
     try:
-        analyzer = AudioAnalyzer(full_path)
-        duration = len(analyzer.y) / analyzer.sr
+        audio_id = _store_upload(file)
+        # header only, so this is constant time whatever the file length
+        info = audio_store.info(audio_id)
 
-        return Response({
+        payload = {
+            "audio_id": audio_id,
             "filename": file.name,
-            "sample_rate": analyzer.sr,
-            "duration": round(duration, 2),
-            "channels": analyzer.y.shape[1] if analyzer.y.ndim > 1 else 1
-        })
+            "sample_rate": info.sr,
+            "duration": round(info.duration, 2),
+            "channels": info.channels
+        }
+        if preview_width and info.n_frames:
+            # the envelope was built while the upload arrived
+            payload["preview"] = _envelope_payload(audio_id, info, 0, info.duration, preview_width)
+        return Response(payload)
+    except InvalidAudio as e:
+        return Response({"error": str(e)}, status=400)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
@@ -31,70 +154,74 @@ def upload_audio(request):
 @api_view(["POST"])
 def apply_filter(request):
     try:
-        # --- Input Extraction ---
+        # --- Input Validation ---
+        try:
+            filter_type, order, cutoff_values = _parse_filter_params(
+                _with_band_cutoffs(request.data))
+            design, phase = _parse_design_params(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # --- Resolve Stored Audio ---
+        audio_id, analyzer = _load_analyzer(request)
+        if analyzer is None:
+            return _missing_audio_response()
+
+        # --- Validate Filter ---
+        try:
+            # designs are cached, so filter_audio reuses this one
+            spec = analyzer.design_filter(filter_type, order, cutoff_values, design, phase)
+            # optional lower rate for the exported file
+            sample_rate = _parse_sample_rate(request.data, analyzer.sr)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # --- Stream Instead Of Saving ---
+        if str(request.data.get("stream", "")).lower() in ("1", "true"):
+            return _filtered_audio_response(request, audio_id, analyzer, spec, sample_rate)
+
+        # --- Filter And Save ---
         file = request.FILES.get("file")
-        filter_type = request.data.get("filter_type")
-        order = int(request.data.get("order", 2))
-        cutoff = request.data.get("cutoff")
+        base_name = os.path.splitext(file.name)[0] if file else audio_id[:12]
+        return Response(filter_audio(
+            analyzer, audio_id, filter_type, order, cutoff_values,
+            results=result_cache, base_name=base_name, design=design, phase=phase,
+            sample_rate=sample_rate))
 
-        # --- Cutoff Processing ---
-        if "," in cutoff:
-            cutoff_values = tuple(map(float, cutoff.split(",")))
-        else:
-            cutoff_values = float(cutoff)
-
-        # --- Save Original File ---
-        original_filename = default_storage.save(file.name, file)
-        full_path = default_storage.path(original_filename)
-
-        # --- Initialize Analyzer ---
-        analyzer = AudioAnalyzer(full_path)
-
-        # --- Apply Filter ---
-        filter_type_lower = filter_type.lower()
-        if filter_type_lower == "low":
-            analyzer.apply_lowpass_filter(cutoff_values, order)
-        elif filter_type_lower == "high":
-            analyzer.apply_highpass_filter(order, cutoff_values)
-        elif filter_type_lower == "band":
-            lowcut = float(request.data.get("low cutoff"))
-            highcut = float(request.data.get("high cutoff"))
-            analyzer.apply_bandpass_filter(lowcut, highcut, order)
-        elif filter_type_lower == "bandstop":
-            lowcut = float(request.data.get("low cutoff"))
-            highcut = float(request.data.get("high cutoff"))
-            analyzer.apply_bandstop_filter((lowcut, highcut), order)
-        else:
-            return Response({"error": "Invalid filter type"}, status=400)
-
-        # --- Generate New Filename ---
-        base_name, _ = os.path.splitext(file.name)
-        cutoff_str = (
-            "-".join(map(str, cutoff_values))
-            if isinstance(cutoff_values, tuple)
-            else str(cutoff_values)
-        )
-        timestamp = datetime.now().strftime("%Y%m%d_%H-%M-%S")
-        new_filename = f"{base_name}_{filter_type_lower}_{cutoff_str}Hz_{timestamp}.wav"
-        output_path = os.path.join(settings.MEDIA_ROOT, new_filename)
-
-        # --- Save Filtered Audio ---
-        filtered_path = analyzer.save_audio_file(
-            use_filtered=True, output_filename=output_path
-        )
-
-        # --- Construct Download URL ---
-        download_url = f"{settings.MEDIA_URL}{new_filename}"
-
-        return Response(
-            {
-                "message": f"{filter_type} pass filter applied",
-                "filter_file": new_filename,
-                "download_url": download_url,
-                "filtered_audio_url": download_url,
-            }
-        )
+    except KeyError as e:
+        return Response({"error": e.args[0]}, status=404)
+    except InvalidAudio as e:
+        return Response({"error": str(e)}, status=400)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
 
+
+@api_view(["POST"])
+def apply_filter_batch(request):
+    """Apply one filter to several stored files (e.g. the tracks of a session)."""
+    # repeated form fields, a JSON list or one comma-separated string
+    raw_ids = (request.data.getlist("audio_ids") if hasattr(request.data, "getlist")
+               else request.data.get("audio_ids") or [])
+    if isinstance(raw_ids, str):
+        raw_ids = [raw_ids]
+    audio_ids = [a for item in raw_ids for a in item.split(",") if a]
+    if not audio_ids:
+        return Response({"error": "audio_ids is required."}, status=400)
+    missing = [a for a in audio_ids if not audio_store.exists(a)]
+    if missing:
+        return Response({"error": f"Unknown audio ids: {', '.join(missing)}"}, status=404)
+
+    try:
+        filter_type, order, cutoff = _parse_filter_params(request.data)
+        design, phase = _parse_design_params(request.data)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        return Response(filter_audio_batch(
+            audio_ids, [audio_store.path(a) for a in audio_ids], [a[:12] for a in audio_ids],
+            filter_type, order, cutoff, results=result_cache,
+            precision=settings.AUDIO_PROCESSING_DTYPE, design=design, phase=phase))
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
@@ -102,31 +229,73 @@ def apply_filter(request):
 @api_view(["POST"])
 def plot_waveform(request):
     try:
-        file = request.FILES.get("file")
-        path = default_storage.save(file.name, file)
-        full_path = default_storage.path(path)
+        try:
+            width = int(request.data.get("width", 1000))
+            height = int(request.data.get("height", 300))
+        except ValueError:
+            return Response({"error": "width and height must be integers"}, status=400)
+        if not (1 <= width <= MAX_IMAGE_SIZE and 1 <= height <= MAX_IMAGE_SIZE):
+            return Response({"error": f"width and height must be between 1 and {MAX_IMAGE_SIZE}"}, status=400)
 
-        analyzer = AudioAnalyzer(full_path)
-        img_str = analyzer.display_norm_wave_content()
+        _, analyzer = _load_analyzer(request)
+        if analyzer is None:
+            return _missing_audio_response()
+        img_str = analyzer.display_norm_wave_content(width=width, height=height)
         return Response({"image": img_str})
+    except KeyError as e:
+        return Response({"error": e.args[0]}, status=404)
+    except InvalidAudio as e:
+        return Response({"error": str(e)}, status=400)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
 
 @api_view(["GET"])
 def get_audio_file(request):
+    audio_id = request.GET.get("audio_id")
     filename = request.GET.get("filename")
 
-    if not filename:
-        return Response({"error": "Filename is required as a query parameter."}, status=400)
-
-    file_path = os.path.join(settings.MEDIA_ROOT, filename)
+    if audio_id:
+        if not audio_store.exists(audio_id):
+            return Response({"error": "File not found."}, status=404)
+        file_path = audio_store.path(audio_id)
+    elif filename:
+        file_path = _media_file(filename)
+    else:
+        return Response({"error": "An audio_id or filename is required as a query parameter."}, status=400)
 
-    if not os.path.exists(file_path):
+    if file_path is None or not os.path.exists(file_path):
         return Response({"error": "File not found."}, status=404)
 
     try:
-        return FileResponse(open(file_path, "rb"), content_type="audio/wav")
+        if audio_id:
+            # stored audio is content-addressed, so its id is a strong ETag
+            etag = audio_id
+        else:
+            stat = os.stat(file_path)
+            etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+        return ranged_file_response(request, file_path, "audio/wav", etag)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(["GET"])
+def stream_filtered_audio(request):
+    """Filtered audio streamed while it is produced, e.g. as an <audio> source."""
+    audio_id = request.GET.get("audio_id")
+    if not audio_store.exists(audio_id):
+        return Response({"error": "A valid audio_id is required."}, status=404)
+    try:
+        filter_type, order, cutoff = _parse_filter_params(request.GET)
+        design, phase = _parse_design_params(request.GET)
+        analyzer = audio_store.load(audio_id)
+        spec = analyzer.design_filter(filter_type, order, cutoff, design, phase)
+        sample_rate = _parse_sample_rate(request.GET, analyzer.sr)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        return _filtered_audio_response(request, audio_id, analyzer, spec, sample_rate)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
@@ -136,48 +305,516 @@ def get_plot_data(request):
     """Get plot data based on user input and return JSON-serializable plot information."""
     try:
         # --- Input Validation ---
-        file = request.FILES.get("file")
-        filter_type = request.data.get("filter_type")
-        order = request.data.get("order", 2)
-        cutoff = request.data.get("cutoff")
-        print("this is my line ", file, filter_type, order, cutoff)
-        print()
-        # Check required parameters
-        if not file or not filter_type or cutoff is None:
-            return Response(
-                {"error": "Missing one or more required parameters: file, filter_type, cutoff"},
-                status=400
-            )
-
-        # --- Type Conversion ---
+        has_audio = request.data.get("audio_id") or request.FILES.get("file")
+        if not has_audio:
+            return _missing_audio_response()
+
+        # --- Filter Parameters ---
         try:
-            order = int(order)
+            filter_type, order, cutoff = _parse_filter_params(request.data)
+            design, phase = _parse_design_params(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # --- Downsampling Method ---
+        downsample = request.data.get("downsample", "minmax")
+        if downsample not in DOWNSAMPLE_METHODS:
+            return Response({"error": f"downsample must be one of {DOWNSAMPLE_METHODS}"}, status=400)
+
+        # --- Payload Encoding ---
+        # "base64" sends float32 typed arrays and start/step x axes
+        encoding = request.data.get("encoding", "json")
+        if encoding not in PAYLOAD_ENCODINGS:
+            return Response({"error": f"encoding must be one of {PAYLOAD_ENCODINGS}"}, status=400)
+
+        # --- Channel Selection ---
+        # a channel index, or the mono mix-down when omitted
+        channel = request.data.get("channel")
+        try:
+            channel = int(channel) if channel not in (None, "") else None
         except ValueError:
-            return Response({"error": "Order must be an integer"}, status=400)
+            return Response({"error": "Channel must be an integer"}, status=400)
 
-        # --- Cutoff Processing ---
+        # --- Analysis ---
+        audio_id, analyzer = _load_analyzer(request)
         try:
-            if "," in cutoff:
-                cutoff = tuple(map(float, cutoff.split(",")))
-            else:
-                cutoff = float(cutoff)
+            if channel is not None:
+                # only validates; the mix-down (None) always exists and is costly
+                analyzer.channel_data(channel)
+            # e.g. a cutoff above Nyquist
+            analyzer.design_filter(filter_type, order, cutoff, design, phase)
+            # optional preview rate for the time-domain response
+            sample_rate = _parse_sample_rate(request.data, analyzer.sr)
+            if sample_rate is not None:
+                # the filter is designed for the preview rate as well
+                design_filter(filter_type, order, cutoff, sample_rate, design, phase)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(compute_plot_data(
+            analyzer, filter_type, order, cutoff, method=downsample, encoding=encoding,
+            channel=channel, design=design, phase=phase, results=result_cache,
+            audio_id=audio_id, sample_rate=sample_rate))
+
+    except KeyError as e:
+        return Response({"error": e.args[0]}, status=404)
+    except InvalidAudio as e:
+        return Response({"error": str(e)}, status=400)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(["POST"])
+def get_spectrum(request):
+    """Magnitude spectrum (fast-length rfft or Welch average), downsampled for plotting."""
+    try:
+        # --- Spectrum Options ---
+        method = request.data.get("method", "rfft")
+        scale = request.data.get("scale", "linear")
+        if method not in SPECTRUM_METHODS:
+            return Response({"error": f"method must be one of {SPECTRUM_METHODS}"}, status=400)
+        if scale not in SPECTRUM_SCALES:
+            return Response({"error": f"scale must be one of {SPECTRUM_SCALES}"}, status=400)
+        try:
+            nperseg = int(request.data.get("nperseg", DEFAULT_SEGMENT))
+            max_points = int(request.data.get("max_points", 2000))
+        except ValueError:
+            return Response({"error": "nperseg and max_points must be integers"}, status=400)
+        if nperseg < 16 or not 2 <= max_points <= MAX_PLOT_POINTS:
+            return Response({"error": f"Require nperseg >= 16 and 2 <= max_points <= {MAX_PLOT_POINTS}"}, status=400)
+
+        # --- Downsampling And Encoding ---
+        downsample = request.data.get("downsample", "minmax")
+        encoding = request.data.get("encoding", "json")
+        if downsample not in DOWNSAMPLE_METHODS or encoding not in PAYLOAD_ENCODINGS:
+            return Response({"error": "Invalid downsample or encoding"}, status=400)
+
+        # --- Channel Selection ---
+        channel = request.data.get("channel")
+        try:
+            channel = int(channel) if channel not in (None, "") else None
         except ValueError:
-            return Response({"error": "Cutoff must be a float or comma-separated floats"}, status=400)
+            return Response({"error": "Channel must be an integer"}, status=400)
 
-        # --- File Handling ---
-        path = default_storage.save(file.name, file)
-        full_path = default_storage.path(path)
         # --- Analysis ---
-        analyzer = AudioAnalyzer(full_path)
-        analyzer.display_filter_frequency_response(
-            filter_type=filter_type, order=order, cutoff=cutoff)
+        _, analyzer = _load_analyzer(request)
+        if analyzer is None:
+            return _missing_audio_response()
+        try:
+            if channel is not None:
+                # only validates; the mix-down (None) always exists and is costly
+                analyzer.channel_data(channel)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(compute_spectrum(
+            analyzer, spectrum_method=method, nperseg=nperseg, scale=scale,
+            method=downsample, encoding=encoding, channel=channel, max_points=max_points))
+
+    except KeyError as e:
+        return Response({"error": e.args[0]}, status=404)
+    except InvalidAudio as e:
+        return Response({"error": str(e)}, status=400)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(["POST"])
+def filter_sweep(request):
+    """Frequency responses and metrics for a list or grid of filter settings.
+
+    Takes ``filters`` (a list of {filter_type, order, cutoff[, design,
+    phase]}) or ``grid`` (lists of values per field, expanded to their
+    cartesian product), plus ``audio_id`` for the time-domain metrics.
+    """
+    audio_id = request.data.get("audio_id")
+    if not audio_store.exists(audio_id):
+        return Response({"error": "A valid audio_id is required."}, status=404)
 
-        analyzer.display_filter_impulse_response(
-            filter_type=filter_type, order=order, cutoff=cutoff)
-        analyzer.display_filtered_audio(
-            filter_type=filter_type, order=order, cutoff=cutoff)
-        # --- Return Data ---
-        return Response({"plot_data": analyzer.get_chartjs_data()})
+    try:
+        filters = _parse_sweep_filters(request.data)
+        worN = int(request.data.get("worN", 512))
+        if not 8 <= worN <= 8192:
+            raise ValueError("worN must be between 8 and 8192")
+        encoding = request.data.get("encoding", "json")
+        if encoding not in PAYLOAD_ENCODINGS:
+            raise ValueError(f"encoding must be one of {PAYLOAD_ENCODINGS}")
+        analyzer = audio_store.load(audio_id)
+        for f in filters:
+            # validate every design before any work is done
+            analyzer.design_filter(f["filter_type"], f["order"], f["cutoff"],
+                                   f["design"], f["phase"])
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=400)
 
+    try:
+        return Response(compute_sweep(
+            analyzer, filters, worN=worN, encoding=encoding,
+            max_duration=SWEEP_MAX_DURATION))
     except Exception as e:
         return Response({"error": str(e)}, status=500)
+
+
+@api_view(["GET"])
+def waveform_window(request):
+    """Min/max waveform envelope of a time window, sized for a pixel width."""
+    audio_id = request.GET.get("audio_id")
+    if not audio_id:
+        return Response({"error": "audio_id is required as a query parameter."}, status=400)
+    if not audio_store.exists(audio_id):
+        return Response({"error": "File not found."}, status=404)
+
+    try:
+        info = audio_store.info(audio_id)
+        start = float(request.GET.get("start", 0))
+        end = float(request.GET.get("end", info.duration))
+        width = int(request.GET.get("width", 1000))
+    except ValueError:
+        return Response({"error": "start and end must be floats and width an integer"}, status=400)
+    if end <= start or not 1 <= width <= MAX_WINDOW_WIDTH:
+        return Response({"error": f"Require start < end and 1 <= width <= {MAX_WINDOW_WIDTH}"}, status=400)
+
+    try:
+        return Response(_envelope_payload(audio_id, info, start, end, width))
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(["GET"])
+def spectrogram(request):
+    """uint8 dB spectrogram tiles covering a time range (or one ``tile``).
+
+    Each tile holds up to ``tile_frames`` STFT frames of ``n_bins`` bins,
+    sent as a base64 uint8 array in frame-major order; 255 is 0 dBFS and 0
+    is ``-db_range`` dB.
+    """
+    audio_id = request.GET.get("audio_id")
+    if not audio_id:
+        return Response({"error": "audio_id is required as a query parameter."}, status=400)
+    if not audio_store.exists(audio_id):
+        return Response({"error": "File not found."}, status=404)
+
+    info = audio_store.info(audio_id)
+    try:
+        channel = request.GET.get("channel")
+        params = SpectrogramParams(
+            n_fft=int(request.GET.get("n_fft", 1024)),
+            hop=int(request.GET.get("hop", 256)),
+            window=request.GET.get("window", "hann"),
+            channel=int(channel) if channel not in (None, "") else None,
+            db_range=float(request.GET.get("db_range", 100)))
+        if params.channel is not None and not 0 <= params.channel < info.channels:
+            raise ValueError(f"Channel {params.channel} out of range for {info.channels} channels")
+        n_tiles = params.n_tiles(info.n_frames)
+        if request.GET.get("tile") is not None:
+            first = last = int(request.GET["tile"])
+            if not 0 <= first < n_tiles:
+                raise ValueError(f"tile must be between 0 and {n_tiles - 1}")
+        else:
+            start = float(request.GET.get("start", 0))
+            end = float(request.GET.get("end", info.duration))
+            if end <= start:
+                raise ValueError("Require start < end")
+            frames_per_tile = TILE_FRAMES * params.hop
+            first = max(int(start * info.sr) // frames_per_tile, 0)
+            last = min(-(-int(end * info.sr) // frames_per_tile), n_tiles) - 1
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    if last - first + 1 > MAX_SPECTROGRAM_TILES:
+        return Response({"error": f"At most {MAX_SPECTROGRAM_TILES} tiles per request; "
+                                  "narrow the time range or increase hop"}, status=400)
+
+    try:
+        tiles = []
+        for index in range(first, last + 1):
+            tile = audio_store.spectrogram_tile(audio_id, params, index)
+            tiles.append({
+                "index": index,
+                "start_frame": index * TILE_FRAMES,
+                "frames": len(tile),
+                "data": encode_array(tile.ravel(), dtype="u1")
+            })
+        return Response({
+            "sample_rate": info.sr,
+            "n_fft": params.n_fft,
+            "hop": params.hop,
+            "window": params.window,
+            "n_bins": params.n_bins,
+            "tile_frames": TILE_FRAMES,
+            "n_tiles": n_tiles,
+            # frame i starts at i * frame_step seconds; bin k is k * bin_step Hz
+            "frame_step": params.hop / info.sr,
+            "bin_step": info.sr / params.n_fft,
+            "db_range": params.db_range,
+            "tiles": tiles
+        })
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+def metrics(request):
+    """Pipeline span metrics in the Prometheus text format, for local scrapers only."""
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render_prometheus(),
+                        content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# --- Live sessions ---
+
+@api_view(["POST"])
+def create_live_session(request):
+    """Open a live filter session on stored audio (see api.live).
+
+    Filter settings, if given, start the first refinement at once; updates
+    are posted to the session's params URL and results arrive on its event
+    stream.
+    """
+    audio_id = request.data.get("audio_id")
+    if not audio_store.exists(audio_id):
+        return Response({"error": "A valid audio_id is required."}, status=404)
+    info = audio_store.info(audio_id)
+    try:
+        channel = request.data.get("channel")
+        channel = int(channel) if channel not in (None, "") else None
+        if channel is not None and not 0 <= channel < info.channels:
+            raise ValueError(f"Channel {channel} out of range for {info.channels} channels")
+        max_points = int(request.data.get("max_points", 2000))
+        if not 2 <= max_points <= MAX_PLOT_POINTS:
+            raise ValueError(f"max_points must be between 2 and {MAX_PLOT_POINTS}")
+        method = request.data.get("downsample", "minmax")
+        encoding = request.data.get("encoding", "json")
+        if method not in DOWNSAMPLE_METHODS or encoding not in PAYLOAD_ENCODINGS:
+            raise ValueError("Invalid downsample or encoding")
+        analyzer = audio_store.load(audio_id)
+        params = None
+        if request.data.get("filter_type") is not None:
+            params = _parse_live_params(request.data, analyzer)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        session = live.create(audio_id, analyzer, channel=channel, max_points=max_points,
+                              method=method, encoding=encoding)
+    except live.SessionLimitReached as e:
+        return Response({"error": str(e)}, status=429)
+    if params is not None:
+        session.update(params)
+    return Response({"session_id": session.id, "generation": session.generation}, status=201)
+
+
+@api_view(["POST"])
+def update_live_session(request, session_id):
+    """New filter settings for a live session; cancels the refinement in progress."""
+    session = live.get(str(session_id))
+    if session is None:
+        return Response({"error": "Session not found."}, status=404)
+    try:
+        params = _parse_live_params(request.data, session.analyzer)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    return Response({"generation": session.update(params)}, status=202)
+
+
+@api_view(["DELETE"])
+def close_live_session(request, session_id):
+    session = live.get(str(session_id))
+    if session is None:
+        return Response({"error": "Session not found."}, status=404)
+    session.close()
+    return Response(status=204)
+
+
+def live_event_stream(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # keep reverse proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def live_session_events(request, session_id):
+    """Server-sent events of a live session: previews, then the full result.
+
+    Plain Django view, as DRF would reject the ``text/event-stream`` Accept
+    header. One event stream per session.
+    """
+    session = live.get(str(session_id))
+    if session is None:
+        return JsonResponse({"error": "Session not found."}, status=404)
+    return live_event_stream(session.iter_events(settings.LIVE_KEEPALIVE))
+
+
+def _parse_live_params(data, analyzer):
+    # Validated filter settings of a live session; raises ValueError
+    filter_type, order, cutoff = _parse_filter_params(data)
+    design, phase = _parse_design_params(data)
+    # designs are cached, so the session's worker reuses this one
+    analyzer.design_filter(filter_type, order, cutoff, design, phase)
+    return {"filter_type": filter_type, "order": order, "cutoff": cutoff,
+            "design": design, "phase": phase}
+
+
+def _parse_filter_params(data):
+    """Validate filter_type/order/cutoff from request data; raises ValueError."""
+    filter_type = data.get("filter_type")
+    cutoff = data.get("cutoff")
+    if not filter_type or cutoff is None:
+        raise ValueError("Missing one or more required parameters: filter_type, cutoff")
+    try:
+        order = int(data.get("order", 2))
+    except (TypeError, ValueError):
+        raise ValueError("Order must be an integer")
+    try:
+        # JSON bodies (e.g. live session updates) may send numbers or lists
+        cutoff = _parse_cutoff(cutoff)
+    except (TypeError, ValueError):
+        raise ValueError("Cutoff must be a float or comma-separated floats")
+    # raises ValueError for unknown types, orders below 1 or cutoffs of the wrong shape
+    return normalize_filter_params(filter_type, order, cutoff)
+
+
+def _with_band_cutoffs(data):
+    # apply_filter also takes band limits as "low cutoff"/"high cutoff" fields
+    filter_type = str(data.get("filter_type") or "").lower()
+    if filter_type in ("band", "bandstop") and "," not in str(data.get("cutoff") or "") \
+            and data.get("low cutoff") is not None and data.get("high cutoff") is not None:
+        return {"filter_type": filter_type, "order": data.get("order", 2),
+                "cutoff": (data.get("low cutoff"), data.get("high cutoff"))}
+    return data
+
+
+def _parse_design_params(data):
+    """Validate the optional design (butter/fir_window/fir_remez) and phase."""
+    return normalize_design_params(data.get("design"), data.get("phase"))
+
+
+def _parse_sample_rate(data, sr):
+    """Optional resampling rate, at most the source's ``sr``; raises ValueError.
+
+    Returns None when it is not given or equals ``sr``.
+    """
+    value = data.get("sample_rate")
+    if value in (None, ""):
+        return None
+    try:
+        sample_rate = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("sample_rate must be an integer")
+    if not 0 < sample_rate <= sr:
+        raise ValueError(f"sample_rate must be between 1 and {sr}")
+    if sample_rate == sr:
+        return None
+    # rejects rates whose ratio to sr needs an impractically long filter
+    rate_factors(sr, sample_rate)
+    return sample_rate
+
+
+def _parse_cutoff(value):
+    # 1000, "1000", [300, 3000] or "300,3000"
+    if isinstance(value, str):
+        value = value.split(",") if "," in value else value
+    if isinstance(value, (list, tuple)):
+        return tuple(float(v) for v in value)
+    return float(value)
+
+
+def _parse_sweep_filters(data):
+    """Filter settings of a sweep request as validated dicts; raises ValueError."""
+    if data.get("filters") is not None:
+        filters = data.get("filters")
+        if not isinstance(filters, list):
+            raise ValueError("filters must be a list")
+    elif data.get("grid") is not None:
+        grid = data.get("grid")
+        if not isinstance(grid, dict):
+            raise ValueError("grid must be an object")
+        fields = ("filter_type", "order", "cutoff", "design", "phase")
+        values = [grid.get(field, [None]) for field in fields]
+        values = [v if isinstance(v, list) else [v] for v in values]
+        filters = [dict(zip(fields, combo)) for combo in itertools.product(*values)]
+    else:
+        raise ValueError("Provide either filters or grid")
+    if not 1 <= len(filters) <= MAX_SWEEP_FILTERS:
+        raise ValueError(f"A sweep takes between 1 and {MAX_SWEEP_FILTERS} filters")
+
+    parsed = []
+    for f in filters:
+        if not isinstance(f, dict) or f.get("filter_type") is None or f.get("cutoff") is None:
+            raise ValueError("Every filter needs filter_type and cutoff")
+        design, phase = normalize_design_params(f.get("design"), f.get("phase"))
+        # a grid without orders leaves them None, meaning the default
+        filter_type, order, cutoff = _parse_filter_params(
+            {field: value for field, value in f.items() if value is not None})
+        parsed.append({"filter_type": filter_type, "order": order, "cutoff": cutoff,
+                       "design": design, "phase": phase})
+    return parsed
+
+
+@api_view(["POST"])
+def submit_job(request):
+    """Queue a filter or plot_data computation on the background process pool."""
+    kind = request.data.get("kind")
+    if kind not in Job.KINDS:
+        return Response({"error": f"kind must be one of {Job.KINDS}"}, status=400)
+    audio_id = request.data.get("audio_id")
+    if not audio_store.exists(audio_id):
+        return Response({"error": "A valid audio_id is required."}, status=404)
+
+    try:
+        filter_type, order, cutoff = _parse_filter_params(request.data)
+        design, phase = _parse_design_params(request.data)
+        sample_rate = _parse_sample_rate(request.data, audio_store.info(audio_id).sr)
+        if kind == "plot_data" and sample_rate is not None:
+            design_filter(filter_type, order, cutoff, sample_rate, design, phase)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    params = {"filter_type": filter_type, "order": order, "cutoff": cutoff,
+              "design": design, "phase": phase, "sample_rate": sample_rate}
+    if kind == "filter":
+        params["base_name"] = audio_id[:12]
+    else:
+        params["method"] = request.data.get("downsample", "minmax")
+        params["encoding"] = request.data.get("encoding", "json")
+        if params["method"] not in DOWNSAMPLE_METHODS or params["encoding"] not in PAYLOAD_ENCODINGS:
+            return Response({"error": "Invalid downsample or encoding"}, status=400)
+
+    try:
+        job = jobs.submit(kind, audio_id, audio_store.path(audio_id), params)
+        return Response(job.to_dict(), status=202)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+
+def _get_job(job_id):
+    try:
+        return jobs.refresh(Job.objects.get(pk=job_id))
+    except Job.DoesNotExist:
+        return None
+
+
+@api_view(["GET"])
+def job_status(request, job_id):
+    job = _get_job(job_id)
+    if job is None:
+        return Response({"error": "Job not found."}, status=404)
+    return Response(job.to_dict())
+
+
+@api_view(["GET"])
+def job_result(request, job_id):
+    job = _get_job(job_id)
+    if job is None:
+        return Response({"error": "Job not found."}, status=404)
+    if job.status == Job.Status.DONE:
+        return Response(job.result)
+    if job.status in (Job.Status.FAILED, Job.Status.CANCELLED):
+        return Response(job.to_dict(), status=409)
+    # still queued or running
+    return Response(job.to_dict(), status=202)
+
+
+@api_view(["POST"])
+def cancel_job(request, job_id):
+    job = _get_job(job_id)
+    if job is None:
+        return Response({"error": "Job not found."}, status=404)
+    return Response(jobs.cancel(job).to_dict())
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,6 +32,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    'api',
     'rest_framework',
     'corsheaders',
     'django.contrib.admin',
@@ -51,6 +53,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # records the "request" span and the Server-Timing header; view spans
+    # come from the timed_view wrappers in api/urls.py, not from this position
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -120,8 +125,51 @@ USE_I18N = True
 USE_TZ = True
 
 MEDIA_URL = "/media/"
+
+# Audio uploads stream straight into the audio store (api.uploads); other
+# file fields keep Django's defaults
+FILE_UPLOAD_HANDLERS = [
+    "api.uploads.AudioStoreUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Content-addressed uploads and the decoded-sample cache shared per process
+AUDIO_STORE_ROOT = MEDIA_ROOT / "audio"
+AUDIO_CACHE_MAX_BYTES = 512 * 1024 * 1024
+SPECTROGRAM_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Content-addressed cache of filtered files and plot data, LRU-evicted
+RESULT_CACHE_ROOT = MEDIA_ROOT / "results"
+RESULT_CACHE_URL = MEDIA_URL + "results/"
+RESULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Pipeline spans: Server-Timing headers and the /api/metrics/ endpoint.
+# Peak-memory tracing (tracemalloc) slows allocations, so it is opt-in
+PROFILE_MEMORY = os.environ.get("PROFILE_MEMORY", "") == "1"
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+# Float precision used for DSP; filtered files keep the source sample format.
+# Samples are held in this dtype, while Butterworth sections and their state
+# stay float64 so IIR output matches the float64 path to within its rounding.
+# None filters the raw samples in float64 and writes float64 WAVs
+AUDIO_PROCESSING_DTYPE = "float32"
+
+# Worker processes for background analysis jobs (api.jobs)
+JOB_WORKERS = os.cpu_count() or 1
+
+# Serve the DSP endpoints from async views (api.async_views); backend/asgi.py
+# turns this on. Their work runs on ASYNC_WORKERS threads per process, and
+# requests beyond ASYNC_MAX_PENDING running or queued ones get a 429
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "") == "1"
+ASYNC_WORKERS = int(os.environ.get("ASYNC_WORKERS", os.cpu_count() or 1))
+ASYNC_MAX_PENDING = int(os.environ.get("ASYNC_MAX_PENDING", 4 * ASYNC_WORKERS))
+ASYNC_RETRY_AFTER = 1
+
+# Live filter sessions (api.live): sessions per process, seconds before an
+# unused session closes, and seconds between keep-alives on its event stream
+LIVE_MAX_SESSIONS = 16
+LIVE_SESSION_TTL = 300
+LIVE_KEEPALIVE = 15
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
@@ -0,0 +1,78 @@
+"""Compare the vectorized PlotData downsamplers with the original loop.
+
+Run from the backend directory:
+    python -m benchmarks.bench_downsample
+"""
+import argparse
+import time
+
+import numpy as np
+
+from signaltools.audio_analyzer import PlotData
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000, 30_000_000)
+
+
+def loop_peak_preserving_downsample(x_axis, y_axis, max_points=2000):
+    # The per-bucket Python loop PlotData used before vectorization
+    if len(x_axis) <= max_points:
+        return x_axis, y_axis
+
+    bucket_size = len(x_axis) // (max_points // 2)
+    x_ds, y_ds = [], []
+
+    for i in range(0, len(x_axis), bucket_size):
+        x_chunk = x_axis[i:i + bucket_size]
+        y_chunk = y_axis[i:i + bucket_size]
+        if len(x_chunk) == 0:
+            continue
+        y_min = np.min(y_chunk)
+        y_max = np.max(y_chunk)
+        idx_min = np.argmin(y_chunk)
+        idx_max = np.argmax(y_chunk)
+
+        if idx_min < idx_max:
+            x_ds.extend([x_chunk[idx_min], x_chunk[idx_max]])
+            y_ds.extend([y_min, y_max])
+        else:
+            x_ds.extend([x_chunk[idx_max], x_chunk[idx_min]])
+            y_ds.extend([y_max, y_min])
+
+    return np.array(x_ds), np.array(y_ds)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--max-points", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'points':>12} {'loop (s)':>10} {'minmax (s)':>11} {'speedup':>8} {'lttb (s)':>10}")
+    for size in args.sizes:
+        x = np.arange(size) / 48000
+        y = np.cumsum(rng.standard_normal(size))
+        plot = PlotData(x_axis=x, y_axis=y)
+
+        ref = loop_peak_preserving_downsample(x, y, args.max_points)
+        got = plot.peak_preserving_downsample(args.max_points)
+        assert np.array_equal(ref[0], got[0]) and np.array_equal(ref[1], got[1])
+
+        t_loop = best_of(lambda: loop_peak_preserving_downsample(x, y, args.max_points), args.repeat)
+        t_minmax = best_of(lambda: plot.peak_preserving_downsample(args.max_points), args.repeat)
+        t_lttb = best_of(lambda: plot.lttb_downsample(args.max_points), args.repeat)
+        print(f"{size:>12} {t_loop:>10.4f} {t_minmax:>11.4f} {t_loop / t_minmax:>7.1f}x {t_lttb:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
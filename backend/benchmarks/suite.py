@@ -0,0 +1,339 @@
+"""Benchmark signaltools and every API endpoint on synthetic audio.
+
+Run from the backend directory:
+    python -m benchmarks.suite                     # run, compare with the baseline
+    python -m benchmarks.suite --save              # record a new baseline
+    python -m benchmarks.suite --quick --only api.
+
+WAV files of several durations, sample rates and channel counts are
+generated in a temporary directory. Endpoints are called through the Django
+test client against a throwaway test database and media directory, and the
+result caches are emptied before each timed call, so every call does its
+full work. The baseline records the best time of each benchmark; the run
+exits with status 1 when one is slower than its baseline by more than the
+tolerance. Baselines are machine specific, so record one on the machine you
+compare on.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import scipy
+import scipy.io.wavfile
+
+from signaltools.audio_analyzer import AudioAnalyzer, PlotData
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# differences below this are timer noise, whatever the relative change
+MIN_REGRESSION_SECONDS = 0.002
+JOB_TIMEOUT = 120.0
+
+
+@dataclass(frozen=True)
+class AudioCase:
+    duration: float
+    sr: int
+    channels: int
+
+    @property
+    def label(self):
+        return f"{self.duration:g}s-{self.sr}Hz-{self.channels}ch"
+
+
+CASES = (
+    AudioCase(1, 8000, 1),
+    AudioCase(10, 44100, 1),
+    AudioCase(10, 44100, 2),
+    AudioCase(60, 48000, 2),
+)
+QUICK_CASES = CASES[:2]
+
+
+def synthetic_wav(case, seed=0):
+    """int16 WAV bytes: a log sine sweep plus noise, different per channel."""
+    rng = np.random.default_rng(seed)
+    n = int(case.duration * case.sr)
+    t = np.arange(n) / case.sr
+    f0, f1 = 50.0, case.sr * 0.45
+    rate = np.log(f1 / f0) / case.duration
+    sweep = np.sin(2 * np.pi * f0 * (np.exp(rate * t) - 1) / rate)
+    y = np.stack([0.5 * sweep * (1 - 0.3 * c) + 0.05 * rng.standard_normal(n)
+                  for c in range(case.channels)], axis=1)
+    if case.channels == 1:
+        y = y[:, 0]
+    buf = io.BytesIO()
+    scipy.io.wavfile.write(buf, case.sr, (y * 32767).astype(np.int16))
+    return buf.getvalue()
+
+
+def measure(fn, repeat, setup=None):
+    """Seconds of ``repeat`` calls of ``fn`` after one untimed warm-up call."""
+    times = []
+    for i in range(repeat + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        if i:
+            times.append(time.perf_counter() - start)
+    return times
+
+
+# --- signaltools ---
+
+def library_benchmarks(case, path):
+    """``{name: (fn, setup)}`` for the AudioAnalyzer stages."""
+    analyzer = AudioAnalyzer(path)
+    nyquist = case.sr / 2
+    low, high = 0.05 * nyquist, 0.25 * nyquist
+    mono = analyzer.channel_data()
+    plot = PlotData(x_axis=np.arange(len(mono)) / case.sr, y_axis=mono)
+    benchmarks = {
+        "analyzer.load": lambda: AudioAnalyzer(path),
+        "analyzer.load_mmap": lambda: AudioAnalyzer(path, mmap=True),
+        "analyzer.apply_lowpass_filter": lambda: analyzer.apply_lowpass_filter(high, 4),
+        "analyzer.apply_highpass_filter": lambda: analyzer.apply_highpass_filter(4, low),
+        "analyzer.apply_bandpass_filter": lambda: analyzer.apply_bandpass_filter(low, high, 4),
+        "analyzer.apply_bandstop_filter": lambda: analyzer.apply_bandstop_filter((low, high), 4),
+        "analyzer.display_filter_frequency_response":
+            lambda: analyzer.display_filter_frequency_response("low", 4, high),
+        "analyzer.display_filter_impulse_response":
+            lambda: analyzer.display_filter_impulse_response("low", 4, high),
+        "analyzer.display_filtered_audio":
+            lambda: analyzer.display_filtered_audio("low", 4, high),
+        "analyzer.display_filtered_audio_resampled":
+            lambda: analyzer.display_filtered_audio("low", 4, high, sample_rate=case.sr // 2),
+        "analyzer.resampled_channel": lambda: analyzer.resampled_channel(case.sr // 2),
+        "plot.peak_preserving_downsample": lambda: plot.peak_preserving_downsample(2000),
+        "analyzer.display_norm_wave_content": lambda: analyzer.display_norm_wave_content(),
+    }
+    return {name: (fn, None) for name, fn in benchmarks.items()}
+
+
+# --- REST endpoints ---
+
+def setup_django(media_root):
+    """Point Django at a test database and ``media_root``; returns a teardown."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment
+
+    media_root = Path(media_root)
+    # before api.storage is imported, which builds the stores from settings
+    override = override_settings(
+        MEDIA_ROOT=media_root, AUDIO_STORE_ROOT=media_root / "audio",
+        RESULT_CACHE_ROOT=media_root / "results")
+    override.enable()
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    def teardown():
+        from api import jobs
+        if jobs._executor is not None:
+            jobs._executor.shutdown()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        override.disable()
+    return teardown
+
+
+def clear_caches():
+    from api.storage import audio_store, result_cache
+    from signaltools.filters import _design
+    shutil.rmtree(result_cache.root, ignore_errors=True)
+    audio_store.samples.clear()
+    audio_store.pyramids.clear()
+    audio_store.spectrogram_tiles.clear()
+    audio_store.resampled.clear()
+    _design.cache_clear()
+
+
+def _check(response, status=200):
+    if response.status_code != status:
+        raise RuntimeError(f"{response.request['PATH_INFO']} answered "
+                           f"{response.status_code}: {response.content[:200]!r}")
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def _run_job(client, data):
+    job_id = _check(client.post("/api/jobs/", data), 202).json()["job_id"]
+    deadline = time.monotonic() + JOB_TIMEOUT
+    while True:
+        status = _check(client.get(f"/api/jobs/{job_id}/")).json()["status"]
+        if status == "done":
+            break
+        if status in ("failed", "cancelled") or time.monotonic() > deadline:
+            raise RuntimeError(f"Job {job_id} ended as {status}")
+        time.sleep(0.005)
+    _check(client.get(f"/api/jobs/{job_id}/result/"))
+    # a finished job is left as it is
+    _check(client.post(f"/api/jobs/{job_id}/cancel/"))
+
+
+def api_benchmarks(case, wav):
+    """``{name: (fn, setup)}`` calling every endpoint through the test client.
+
+    Most calls start from empty caches; the setup of the download by
+    filename produces the cached file it fetches.
+    """
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client
+
+    client = Client()
+
+    def upload():
+        return _check(client.post("/api/upload/", {
+            "file": SimpleUploadedFile("bench.wav", wav, content_type="audio/wav")}))
+
+    audio_id = upload().json()["audio_id"]
+    cutoff = str(case.sr * 0.1)
+    band = f"{case.sr * 0.02},{case.sr * 0.2}"
+    filt = {"audio_id": audio_id, "filter_type": "low", "order": 4, "cutoff": cutoff}
+    sweep = {"audio_id": audio_id,
+             "filters": [{"filter_type": "low", "order": order, "cutoff": case.sr * c}
+                         for order in (2, 4, 8) for c in (0.05, 0.1, 0.2)]}
+    window_end = min(case.duration, 5.0)
+    filename = None
+
+    def filter_file():
+        # cold caches, then the cached result get_audio serves by filename
+        nonlocal filename
+        clear_caches()
+        filename = _check(client.post("/api/filter/", filt)).json()["filter_file"]
+
+    cold = {
+        "api.upload": upload,
+        "api.filter": lambda: _check(client.post("/api/filter/", filt)),
+        "api.filter_stream": lambda: _check(client.post("/api/filter/", {**filt, "stream": "1"})),
+        "api.filter_resampled": lambda: _check(client.post("/api/filter/", {
+            **filt, "sample_rate": case.sr // 2})),
+        "api.filter_bandstop": lambda: _check(client.post("/api/filter/", {
+            **filt, "filter_type": "bandstop", "cutoff": band})),
+        "api.filter_batch": lambda: _check(client.post("/api/filter_batch/", {
+            **filt, "audio_ids": [audio_id]})),
+        "api.plot_waveform": lambda: _check(client.post("/api/plot_waveform/", {"audio_id": audio_id})),
+        "api.get_audio": lambda: _check(client.get("/api/get_audio/", {"audio_id": audio_id})),
+        "api.get_audio_range": lambda: _check(client.get(
+            "/api/get_audio/", {"audio_id": audio_id}, HTTP_RANGE="bytes=0-65535"), 206),
+        "api.filtered_audio": lambda: _check(client.get("/api/filtered_audio/", filt)),
+        "api.get_plot_data": lambda: _check(client.post("/api/get_plot_data/", filt)),
+        "api.get_plot_data_base64": lambda: _check(client.post("/api/get_plot_data/", {
+            **filt, "encoding": "base64"})),
+        "api.get_plot_data_resampled": lambda: _check(client.post("/api/get_plot_data/", {
+            **filt, "sample_rate": case.sr // 2})),
+        "api.spectrum_rfft": lambda: _check(client.post("/api/spectrum/", {"audio_id": audio_id})),
+        "api.spectrum_welch": lambda: _check(client.post("/api/spectrum/", {
+            "audio_id": audio_id, "method": "welch"})),
+        "api.sweep": lambda: _check(client.post("/api/sweep/", sweep,
+                                                content_type="application/json")),
+        "api.waveform_window": lambda: _check(client.get("/api/waveform_window/", {
+            "audio_id": audio_id, "start": 0, "end": window_end})),
+        "api.spectrogram": lambda: _check(client.get("/api/spectrogram/", {
+            "audio_id": audio_id, "start": 0, "end": window_end, "hop": 1024})),
+        "api.metrics": lambda: _check(client.get("/api/metrics/")),
+        "api.jobs": lambda: _run_job(client, {**filt, "kind": "plot_data"}),
+    }
+    benchmarks = {name: (fn, clear_caches) for name, fn in cold.items()}
+    benchmarks["api.get_audio_filename"] = (
+        lambda: _check(client.get("/api/get_audio/", {"filename": filename})), filter_file)
+    return benchmarks
+
+
+# --- Baseline ---
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Names of the benchmarks slower than their baseline beyond ``tolerance``."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = max(previous["min"] * (1 + tolerance), previous["min"] + MIN_REGRESSION_SECONDS)
+        if result["min"] > limit:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="only the short audio cases")
+    parser.add_argument("--only", default="", help="run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline.exists() and not args.save:
+        with open(args.baseline) as f:
+            recorded = json.load(f)
+        baseline = recorded["results"]
+        if recorded.get("environment") != environment():
+            print(f"note: {args.baseline} was recorded in a different environment")
+
+    workdir = tempfile.mkdtemp(prefix="audio-bench-")
+    teardown = setup_django(os.path.join(workdir, "media"))
+    results = {}
+    try:
+        print(f"{'benchmark':<62} {'min (s)':>9} {'median (s)':>10} {'baseline':>9}")
+        for case in QUICK_CASES if args.quick else CASES:
+            wav = synthetic_wav(case)
+            path = os.path.join(workdir, f"{case.label}.wav")
+            with open(path, "wb") as f:
+                f.write(wav)
+            benchmarks = {**library_benchmarks(case, path), **api_benchmarks(case, wav)}
+            for name, (fn, setup) in benchmarks.items():
+                if args.only not in name:
+                    continue
+                key = f"{name}[{case.label}]"
+                times = measure(fn, args.repeat, setup)
+                results[key] = {"min": min(times), "median": statistics.median(times),
+                                "repeat": len(times)}
+                previous = baseline.get(key, {}).get("min")
+                shown = f"{previous:>9.4f}" if previous is not None else f"{'-':>9}"
+                print(f"{key:<62} {min(times):>9.4f} {statistics.median(times):>10.4f} {shown}")
+    finally:
+        teardown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name in regressions:
+        print(f"REGRESSION {name}: {results[name]['min']:.4f}s vs {baseline[name]['min']:.4f}s")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,20 @@ import logging
 from dataclasses import dataclass, field, asdict
 from typing import List
 import numpy as np
-import scipy.constants
 import scipy.io.wavfile
 import scipy.signal
-import matplotlib.pyplot as plt
 from enum import Enum
-import io
 import base64
-import sounddevice as sd
+from signaltools.downsample import DOWNSAMPLE_METHODS, lttb_indices, minmax_indices
+from signaltools.encoding import encode_array, encode_axis
+from signaltools.filters import design_filter
+from signaltools.profiling import profiled
+from signaltools.render import render_waveform_png
+from signaltools.resample import StreamingResampler, rate_factors
+from signaltools.sampleformat import from_float, to_float
+from signaltools.spectrum import DEFAULT_SEGMENT, magnitude_spectrum
+from signaltools.streaming import DEFAULT_BLOCK_SIZE, filter_to_wav, iter_blocks, iter_filtered_wav
+from signaltools.wavinfo import read_wav_info
 
 # need to adjust some things so that the dtft of music files can be plotted
 # then this should be ready to be used as a backend for the audio app
@@ -31,96 +37,232 @@ class PlotData:
     title: str = ""
     plot_type: PlotType = PlotType.LINE  # default is line plot
 
-    def peak_preserving_downsample(self, max_points=2000):
+    def downsample_indices(self, max_points=2000, method="minmax"):
+        # Indices of the points to keep, or None if everything already fits
         if len(self.x_axis) <= max_points:
+            return None
+        if method == "minmax":
+            return minmax_indices(self.y_axis, max_points)
+        if method == "lttb":
+            # Largest-Triangle-Three-Buckets: keeps the visual shape with
+            # exactly max_points points
+            return lttb_indices(self.x_axis, self.y_axis, max_points)
+        raise ValueError(f"method must be one of {DOWNSAMPLE_METHODS}")
+
+    def downsample(self, max_points=2000, method="minmax"):
+        idx = self.downsample_indices(max_points, method)
+        if idx is None:
             return self.x_axis, self.y_axis
+        return np.asarray(self.x_axis)[idx], np.asarray(self.y_axis)[idx]
 
-        bucket_size = len(self.x_axis) // (max_points // 2)
-        x_ds, y_ds = [], []
-
-        for i in range(0, len(self.x_axis), bucket_size):
-            x_chunk = self.x_axis[i:i + bucket_size]
-            y_chunk = self.y_axis[i:i + bucket_size]
-            if len(x_chunk) == 0:
-                continue
-            y_min = np.min(y_chunk)
-            y_max = np.max(y_chunk)
-            idx_min = np.argmin(y_chunk)
-            idx_max = np.argmax(y_chunk)
-
-            if idx_min < idx_max:
-                x_ds.extend([x_chunk[idx_min], x_chunk[idx_max]])
-                y_ds.extend([y_min, y_max])
-            else:
-                x_ds.extend([x_chunk[idx_max], x_chunk[idx_min]])
-                y_ds.extend([y_max, y_min])
+    def peak_preserving_downsample(self, max_points=2000):
+        return self.downsample(max_points, "minmax")
 
-        return np.array(x_ds), np.array(y_ds)
+    def lttb_downsample(self, max_points=2000):
+        return self.downsample(max_points, "lttb")
 
-    def to_chartjs(self, max_points=2000):
-        x_ds, y_ds = self.peak_preserving_downsample(max_points)
+    def to_chartjs(self, max_points=2000, method="minmax", encoding="json"):
+        if encoding == "base64":
+            return self.to_compact(max_points, method)
+        x_ds, y_ds = self.downsample(max_points, method)
         return {
-            "labels": list(x_ds),
+            "labels": np.asarray(x_ds).tolist(),
             "datasets": [{
                 "label": self.title or "Plot",
-                "data": list(y_ds),
+                "data": np.asarray(y_ds).tolist(),
                 "type": self.plot_type.value,  # chart.js supports per-dataset type
                 "fill": self.plot_type == PlotType.AREA
             }]
         }
 
+    def to_compact(self, max_points=2000, method="minmax"):
+        # Same content as to_chartjs, but y is a base64 float32 array and x is
+        # start/step (plus indices after downsampling) when evenly spaced
+        idx = self.downsample_indices(max_points, method)
+        y = self.y_axis if idx is None else np.asarray(self.y_axis)[idx]
+        return {
+            "x": encode_axis(self.x_axis, idx),
+            "datasets": [{
+                "label": self.title or "Plot",
+                "data": encode_array(y),
+                "type": self.plot_type.value,
+                "fill": self.plot_type == PlotType.AREA
+            }]
+        }
+
 class AudioAnalyzer:
-    def __init__(self, filename):
+    @profiled("analyzer.load")
+    def __init__(self, filename, mmap=False, precision=None):
+        # With mmap=True only the WAV header is read here; the samples are
+        # memory-mapped on first access to self.y so pages load on demand.
+        # With a precision (e.g. "float32") samples are scaled to [-1, 1)
+        # floats of that dtype for processing and saved back in the source
+        # sample format; without one the raw samples are filtered in float64
         try:
-            self.sr, self.y = scipy.io.wavfile.read(filename)
-            self.filtered_signal = None
-            self.filename = filename
-            self.plot_data = {
-                "filter_frequency_response": PlotData(),
-                "filter_impulse_response": PlotData(),
-                "filter_time_domain_response": PlotData()
-            }
+            if mmap:
+                self.info = read_wav_info(filename)
+                self._init_state(self.info.sr, None, filename, precision)
+            else:
+                sr, y = scipy.io.wavfile.read(filename)
+                self._init_state(sr, y, filename, precision)
         except Exception as e:
             logging.error(f"Failed to load audio file {filename}: {e}")
             raise IOError(f"Could not read file {filename}: {e}")
 
-    def apply_bandpass_filter(self, lowcut, highcut, order):
+    @classmethod
+    def from_samples(cls, sr, y, filename=None, precision=None):
+        # Builds an analyzer around already decoded samples (e.g. from a cache)
+        analyzer = cls.__new__(cls)
+        analyzer.info = None
+        analyzer._init_state(sr, y, filename, precision)
+        return analyzer
+
+    def _init_state(self, sr, y, filename, precision=None):
+        self.sr, self._y = sr, y
+        self.precision = np.dtype(precision) if precision else None
+        self.filtered_signal = None
+        self.filter_spec = None
+        self.sos = None
+        self.filename = filename
+        # optional mapping (e.g. an LRUByteCache) keeping resampled_channel results
+        self.resample_cache = None
+        self.plot_data = {
+            "filter_frequency_response": PlotData(),
+            "filter_impulse_response": PlotData(),
+            "filter_time_domain_response": PlotData()
+        }
+
+    @property
+    def y(self):
+        if self._y is None:
+            self._y = self._map_samples()
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = value
+
+    @profiled("analyzer.map_samples")
+    def _map_samples(self):
+        info = self.info
+        if info.dtype is None:
+            # formats numpy cannot view directly (e.g. 24-bit) are decoded
+            _, y = scipy.io.wavfile.read(self.filename)
+            return y
+        shape = (info.n_frames, info.channels) if info.channels > 1 else (info.n_frames,)
+        return np.memmap(self.filename, dtype=info.dtype, mode="r",
+                         offset=info.data_offset, shape=shape)
+
+    @property
+    def channels(self):
+        if self._y is None:
+            return self.info.channels
+        return self._y.shape[1] if self._y.ndim > 1 else 1
+
+    @property
+    def n_frames(self):
+        return self.info.n_frames if self._y is None else len(self._y)
+
+    @property
+    def duration(self):
+        return self.n_frames / self.sr
+
+    @property
+    def output_dtype(self):
+        # Sample format written by save_audio_file for filtered audio
+        return self.y.dtype if self.precision is not None else np.dtype(np.float64)
+
+    def to_processing(self, x):
+        # Samples of this file (whole, a block, or a channel mix of them) in
+        # the processing precision; raw samples when no precision is set
+        if self.precision is None:
+            return x
+        return to_float(x, self.precision, source_dtype=self.y.dtype)
+
+    def channel_data(self, channel=None):
+        # One channel as a 1-D view, or the mono mix-down when channel is None
+        if self.y.ndim == 1:
+            if channel not in (None, 0):
+                raise ValueError(f"Channel {channel} out of range for mono audio")
+            return self.y
+        if channel is None:
+            return self.y.mean(axis=1)
+        if not 0 <= channel < self.y.shape[1]:
+            raise ValueError(f"Channel {channel} out of range for {self.y.shape[1]} channels")
+        return self.y[:, channel]
+
+    @profiled("analyzer.resample")
+    def resampled_channel(self, sample_rate, channel=None, block_size=DEFAULT_BLOCK_SIZE):
+        # channel_data at sample_rate in the processing precision, converted
+        # block by block; a multi-channel mix-down is also formed per block,
+        # so no full-rate copy of the signal is made. Results are kept in
+        # resample_cache when one is set (AudioStore sets it)
+        key = (self.filename, int(sample_rate), channel, str(self.precision))
+        if self.resample_cache is not None:
+            cached = self.resample_cache.get(key)
+            if cached is not None:
+                return cached
+        rates = rate_factors(self.sr, sample_rate)
+        mixdown = channel is None and self.y.ndim > 1
+        blocks = iter_blocks(self.y if mixdown else self.channel_data(channel), block_size)
+        if mixdown:
+            # a product with equal weights mixes far faster than mean(axis=1)
+            weights = np.full(self.channels, 1.0 / self.channels, dtype=self.precision or np.float64)
+            blocks = (self.to_processing(block) @ weights for block in blocks)
+        else:
+            blocks = (self.to_processing(block) for block in blocks)
+        resampled = list(StreamingResampler(*rates).stream(blocks))
+        x = np.concatenate(resampled) if resampled else np.zeros(0, self.precision)
+        if self.resample_cache is not None:
+            # shared between requests, so guard against in-place edits
+            x.setflags(write=False)
+            self.resample_cache.put(key, x)
+        return x
+
+    @profiled("analyzer.apply_filter")
+    def apply_filter(self, spec, defer=False):
+        # With defer=True only the design is kept; save_audio_file then streams
+        # the filter block by block instead of holding the whole output
+        self.filter_spec = spec
+        self.sos = spec.sos
+        self.filtered_signal = None if defer else spec.apply(self.to_processing(self.y),
+                                                             self.precision)
+
+    @profiled("analyzer.design_filter")
+    def design_filter(self, filter_type, order, cutoff, design="butter", phase="causal"):
+        return design_filter(filter_type, order, cutoff, self.sr, design, phase)
+
+    def apply_bandpass_filter(self, lowcut, highcut, order, defer=False):
         try:
-            sos = scipy.signal.butter(
-                order, [lowcut, highcut], btype='band', fs=self.sr, output='sos')
-            self.filtered_signal = scipy.signal.sosfilt(sos, self.y)
+            spec = self.design_filter("band", order, (lowcut, highcut))
+            self.apply_filter(spec, defer)
         except ValueError as e:
             logging.error("Error applying bandpass filter: %s", e)
             raise
 
-    def apply_highpass_filter(self, order, cutoff):
+    def apply_highpass_filter(self, order, cutoff, defer=False):
         try:
-            w_n = cutoff / (self.sr/2)
-            sos = scipy.signal.butter(
-                N=order, Wn=w_n, btype='high', fs=self.sr, output='sos')
-            self.filtered_signal = scipy.signal.sosfilt(sos, self.y)
+            spec = self.design_filter("high", order, cutoff)
+            self.apply_filter(spec, defer)
         except ValueError as e:
             logging.error("Error applying highpass filter: %s", e)
             raise
 
-    def apply_lowpass_filter(self, cutoff, order):
+    def apply_lowpass_filter(self, cutoff, order, defer=False):
         try:
-            w_n = cutoff / (self.sr/2)
-            sos = scipy.signal.butter(
-                order, Wn=w_n, btype='low', fs=self.sr, output='sos')
-            self.filtered_signal = scipy.signal.sosfilt(sos, self.y)
+            spec = self.design_filter("low", order, cutoff)
+            self.apply_filter(spec, defer)
         except ValueError as e:
             logging.error("Error applying lowpass filter: %s", e)
             raise
 
-    def apply_bandstop_filter(self, cutoff: tuple, order: int):
+    def apply_bandstop_filter(self, cutoff: tuple, order: int, defer=False):
         try:
             if not isinstance(cutoff, tuple) or len(cutoff) != 2:
                 raise ValueError(
                     "Cutoff must be a tuple (low_freq, high_freq)")
-            sos = scipy.signal.butter(
-                order, cutoff, btype='bandstop', fs=self.sr, output='sos')
-            self.filtered_signal = scipy.signal.sosfilt(sos, self.y)
+            spec = self.design_filter("bandstop", order, cutoff)
+            self.apply_filter(spec, defer)
         except ValueError as e:
             logging.error("Error applying bandstop filter: %s", e)
             raise
@@ -133,32 +275,12 @@ class AudioAnalyzer:
             logging.error("Error computing Fourier Transform: %s", e)
             raise
 
-    def display_filter_frequency_response(self, filter_type, order, cutoff, display=False):
+    @profiled("analyzer.frequency_response")
+    def display_filter_frequency_response(self, filter_type, order, cutoff, display=False,
+                                          design="butter", phase="causal"):
         # Displays the frequency response of a filter
-        w_n = cutoff / (self.sr / 2)
-        if filter_type.lower() == "high":
-            b, a = scipy.signal.butter(
-                order, Wn=w_n, btype="high", output='ba')
-        elif filter_type.lower() == "low":
-            b, a = scipy.signal.butter(order, Wn=w_n, btype="low", output='ba')
-        elif filter_type.lower() == "band":
-            if not isinstance(cutoff, tuple):
-                raise ValueError(
-                    "Cutoff for 'band' type must be a tuple (low, high)")
-            b, a = scipy.signal.butter(
-                order, Wn=cutoff, btype="band", fs=self.sr, output='ba')
-        elif filter_type.lower() == "bandstop":
-            if not isinstance(cutoff, tuple):
-                raise ValueError(
-                    "Cutoff for 'bandstop' type must be a tuple (low, high)")
-            b, a = scipy.signal.butter(
-                order, Wn=cutoff, btype="bandstop", fs=self.sr, output='ba')
-        else:
-            raise ValueError(
-                "filter_type must be 'high', 'low', 'band', or 'bandstop'")
-        w, h = scipy.signal.freqz(b, a)
-        x = w * \
-            self.sr / (2 * np.pi)
+        spec = self.design_filter(filter_type, order, cutoff, design, phase)
+        x, h = spec.frequency_response()
         y = np.abs(h)
 
         self.plot_data["filter_frequency_response"].x_axis = x
@@ -171,43 +293,22 @@ class AudioAnalyzer:
             self._plot(f"{filter_type} pass filter response",
                        x=x, y=y, x_label="Frequency (Hz)", y_label="Magnitude")
 
-    def display_filter_impulse_response(self, filter_type, order, cutoff, display=False):
-        # Displays the impulse response of a filter using the length of the audio data
+    @profiled("analyzer.impulse_response")
+    def display_filter_impulse_response(self, filter_type, order, cutoff, display=False,
+                                        threshold=1e-6, max_duration=None,
+                                        design="butter", phase="causal"):
+        # Displays the impulse response of a filter, computed only until it
+        # decays below threshold (relative to its peak) and never longer than
+        # max_duration seconds or the length of the audio data
         try:
-            # Calculate normalized cutoff frequency or frequencies
-            w_n = cutoff / (self.sr / 2) if isinstance(cutoff,
-                                                       (int, float)) else np.array(cutoff) / (self.sr / 2)
-            # Design the filter based on type and cutoff
-            if filter_type.lower() == "high":
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="high", output='ba')
-            elif filter_type.lower() == "low":
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="low", output='ba')
-            elif filter_type.lower() == "band":
-                if not isinstance(cutoff, tuple):
-                    raise ValueError(
-                        "Cutoff for 'band' type must be a tuple (low, high)")
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="band", fs=self.sr, output='ba')
-            elif filter_type.lower() == "bandstop":
-                if not isinstance(cutoff, tuple):
-                    raise ValueError(
-                        "Cutoff for 'bandstop' type must be a tuple (low, high)")
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="bandstop", fs=self.sr, output='ba')
-            else:
-                raise ValueError(
-                    "filter_type must be 'high', 'low', 'band', or 'bandstop'")
+            spec = self.design_filter(filter_type, order, cutoff, design, phase)
 
-            # Generate an impulse signal with the same length as the audio data
-            impulse = np.zeros(len(self.y))
-            impulse[0] = 1  # Creating an impulse at the start
-            # Compute the filter's response to the impulse
-            response = scipy.signal.lfilter(b, a, impulse)
-
-            # Calculate the time array corresponding to each sample in the response
-            time_array = np.arange(len(response)) / self.sr
+            max_length = self.n_frames
+            if max_duration is not None:
+                max_length = min(max_length, int(max_duration * self.sr))
+            # two-sided and centred on t=0 for zero-phase filters
+            time_array, response = spec.impulse_response(threshold=threshold,
+                                                         max_length=max_length)
             self.plot_data["filter_impulse_response"].x_axis = time_array
             self.plot_data["filter_impulse_response"].y_axis = response
             self.plot_data["filter_impulse_response"].x_label = "Time (seconds)"
@@ -222,37 +323,26 @@ class AudioAnalyzer:
             logging.error("Invalid filter parameters: %s", e)
             raise
 
-    def display_filtered_audio(self, filter_type, order, cutoff, display=False):
+    @profiled("analyzer.filtered_audio")
+    def display_filtered_audio(self, filter_type, order, cutoff, display=False, channel=None,
+                               design="butter", phase="causal", sample_rate=None):
+        # Plots one channel, or the mono mix-down when channel is None (the
+        # filter is linear, so filtering the mix equals mixing the outputs).
+        # With a sample_rate below self.sr the signal is resampled to it
+        # first and the filter designed for it, a cheaper preview for plots
+        # that are downsampled to a few thousand points anyway
         try:
-            # Calculate normalized cutoff frequency or frequencies
-            w_n = cutoff / (self.sr / 2) if isinstance(cutoff,
-                                                       (int, float)) else np.array(cutoff) / (self.sr / 2)
-            # Design the filter based on type and cutoff
-            if filter_type.lower() == "high":
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="high", output='ba')
-            elif filter_type.lower() == "low":
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="low", output='ba')
-            elif filter_type.lower() == "band":
-                if not isinstance(cutoff, tuple):
-                    raise ValueError(
-                        "Cutoff for 'band' type must be a tuple (low, high)")
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="band", fs=self.sr, output='ba')
-            elif filter_type.lower() == "bandstop":
-                if not isinstance(cutoff, tuple):
-                    raise ValueError(
-                        "Cutoff for 'bandstop' type must be a tuple (low, high)")
-                b, a = scipy.signal.butter(
-                    order, Wn=w_n, btype="bandstop", fs=self.sr, output='ba')
+            if sample_rate is None or int(sample_rate) == self.sr:
+                sr = self.sr
+                x = self.to_processing(self.channel_data(channel))
             else:
-                raise ValueError(
-                    "filter_type must be 'high', 'low', 'band', or 'bandstop'")
+                sr = int(sample_rate)
+                x = self.resampled_channel(sr, channel)
+            spec = design_filter(filter_type, order, cutoff, sr, design, phase)
 
-            filt_speech = scipy.signal.lfilter(b, a, self.y)
+            filt_speech = spec.apply(x, self.precision)
             # Calculate the time array corresponding to each sample in the response
-            time_array = np.arange(len(self.y)) / self.sr
+            time_array = np.arange(len(filt_speech)) / sr
             # fill the plot data
             self.plot_data["filter_time_domain_response"].x_axis = time_array
             self.plot_data["filter_time_domain_response"].y_axis = filt_speech
@@ -269,78 +359,128 @@ class AudioAnalyzer:
 
     def display_spectral_content(self):
         # Display the spectral content of the audio
+        from signaltools.plotting import show_spectrogram
         f, t, Sxx = scipy.signal.spectrogram(self.y, self.sr)
-        plt.pcolormesh(t, f, 10 * np.log10(Sxx))
-        plt.ylabel('Frequency [Hz]')
-        plt.xlabel('Time [sec]')
-        plt.title('Spectral Content of ' + self.filename)
-        plt.colorbar(label='Intensity [dB]')
-        plt.show()
-
-    def display_norm_wave_content(self):
-        # Display the normalized waveform of the audio and converts the plot
-        # to an image string
-        plt.plot(np.arange(len(self.y)) / self.sr,
-                 self.y / np.max(np.abs(self.y)))
-        print(self.filename)
-        plt.title('Normalized Waveform')
-        plt.xlabel('Time [seconds]')
-        plt.ylabel('Amplitude [normalized]')
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
-        buf.close()
-        plt.close()
-        return img_str
+        show_spectrogram(t, f, Sxx, 'Spectral Content of ' + self.filename)
+
+    @profiled("analyzer.waveform_png")
+    def display_norm_wave_content(self, width=1000, height=300):
+        # Renders the normalized waveform as a column-wise min/max envelope
+        # straight to a PNG and returns it as a base64 string; no pyplot
+        # state is involved, so concurrent requests are safe. Each channel
+        # is drawn in its own lane, normalized by its own peak
+        png = render_waveform_png(self.y, width=width, height=height)
+        return base64.b64encode(png).decode('utf-8')
 
     def _plot(self, title, x, y, x_label, y_label):
-        # Plots the frequency response of a filter
-        plt.plot(x, y)
-        plt.title(title)
-        plt.xlabel(x_label)
-        plt.ylabel(y_label)
-        plt.grid()
-        plt.show()
+        # Plots the frequency response of a filter; matplotlib is only
+        # imported when an interactive plot is actually requested
+        from signaltools.plotting import show_line_plot
+        show_line_plot(title, x, y, x_label, y_label)
 
     def play_audio(self, filtered_signal=False):
+        # sounddevice (and PortAudio) is only loaded when playing audio
+        from signaltools.playback import play
         if filtered_signal:
-            if self.filtered_signal is not None and filtered_signal.size > 0:
-                sd.play(data=filtered_signal, samplerate=self.sr)
+            if self.filtered_signal is not None and self.filtered_signal.size > 0:
+                play(self.filtered_signal, self.sr)
             else:
                 raise ValueError(
                     "A filter must be applied before it can be played.")
         else:
-            sd.play(data=self.y, samplerate=self.sr)
+            play(self.y, self.sr)
+
+    def spectrum(self, method="rfft", nperseg=DEFAULT_SEGMENT, scale="linear", channel=None):
+        # (freqs, magnitude) of one channel (or the mix-down) over the
+        # non-negative frequencies: a fast-length rfft, or Welch-averaged over
+        # nperseg-sample segments
+        return magnitude_spectrum(
+            self.to_processing(self.channel_data(channel)), self.sr, method, nperseg, scale)
 
-    def display_dtft_magnitude(self):
-        # Plots the dtft magnitude of the file
-        b, a = scipy.signal.freqz(self.y, 1, len(self.y), fs=self.sr)
-        self._plot(f"DTFT Mag: {self.filename}", x=b, y=abs(
-            a), x_label="Frequency (Hz)", y_label="Magnitude")
+    @profiled("analyzer.spectrum")
+    def display_dtft_magnitude(self, display=True, method="rfft", nperseg=DEFAULT_SEGMENT,
+                               scale="linear", channel=None):
+        # Magnitude spectrum from spectrum(), stored in
+        # plot_data["magnitude_spectrum"] for the chart.js path
+        freqs, magnitude = self.spectrum(method, nperseg, scale, channel)
+        y_label = "Magnitude (dB)" if scale == "db" else "Magnitude"
+        title = f"DTFT Mag: {self.filename}"
+        self.plot_data["magnitude_spectrum"] = PlotData(
+            freqs, magnitude, "Frequency (Hz)", y_label, title)
+        if display:
+            self._plot(title, x=freqs, y=magnitude,
+                       x_label="Frequency (Hz)", y_label=y_label)
 
-    def save_audio_file(self, use_filtered=True, output_filename=None):
+    @profiled("analyzer.save_audio")
+    def save_audio_file(self, use_filtered=True, output_filename=None,
+                        block_size=DEFAULT_BLOCK_SIZE, sample_rate=None):
+        # With a sample_rate other than self.sr the file is resampled to it
+        # block by block on the way to disk
         try:
-            data_to_save = self.filtered_signal if use_filtered and self.filtered_signal is not None else self.y
+            has_filter = self.filtered_signal is not None or self.filter_spec is not None
             if output_filename is None:
-                suffix = '_filtered' if use_filtered and self.filtered_signal is not None else '_original'
+                suffix = '_filtered' if use_filtered and has_filter else '_original'
                 output_filename = self.filename.replace(
                     '.wav', f'{suffix}.wav')
+            if use_filtered and self.filtered_signal is None and self.filter_spec is not None:
+                # deferred filter: stream it to disk with bounded memory
+                return filter_to_wav(self.filter_spec, self.y, self.sr,
+                                     output_filename, block_size=block_size,
+                                     precision=self.precision,
+                                     out_dtype=self.output_dtype, sample_rate=sample_rate)
+            data_to_save = self.filtered_signal if use_filtered and self.filtered_signal is not None else self.y
+            if sample_rate is not None and int(sample_rate) != self.sr:
+                # resampled as floats, then saved in the data's own format
+                is_filtered = data_to_save is self.filtered_signal
+                return filter_to_wav(None, data_to_save, self.sr, output_filename,
+                                     block_size=block_size,
+                                     precision=self.precision or np.float64,
+                                     out_dtype=self.output_dtype if is_filtered else self.y.dtype,
+                                     sample_rate=sample_rate)
+            if data_to_save is self.filtered_signal and self.precision is not None:
+                data_to_save = from_float(data_to_save, self.output_dtype)
             scipy.io.wavfile.write(output_filename, self.sr, data_to_save)
             return output_filename
         except Exception as e:
             logging.error("Error saving audio file: %s", e)
             raise IOError("Failed to save file: %s", e)
 
-    def to_serializable(self):
+    def iter_filtered_wav(self, block_size=DEFAULT_BLOCK_SIZE, sample_rate=None):
+        # WAV bytes of the applied filter, produced block by block so they
+        # can be sent while the rest is still being filtered
+        if self.filter_spec is None:
+            raise ValueError("A filter must be applied before it can be streamed.")
+        return iter_filtered_wav(self.filter_spec, self.y, self.sr, block_size,
+                                 precision=self.precision, out_dtype=self.output_dtype,
+                                 sample_rate=sample_rate)
+
+    @profiled("analyzer.serialize")
+    def to_serializable(self, compact=False):
+        # compact=True sends full-resolution axes as typed arrays (see
+        # signaltools.encoding) instead of lists of Python floats
+        if compact:
+            plot_data = {
+                key: {
+                    "x_axis": encode_axis(value.x_axis),
+                    "y_axis": encode_array(value.y_axis),
+                    "x_label": value.x_label,
+                    "y_label": value.y_label,
+                    "title": value.title,
+                    "plot_type": value.plot_type.value
+                }
+                for key, value in self.plot_data.items()
+            }
+        else:
+            plot_data = {key: asdict(value) for key, value in self.plot_data.items()}
         return {
-            "plot_data": {key: asdict(value) for key, value in self.plot_data.items()},
+            "plot_data": plot_data,
             "sample_rate": self.sr,
             "file": self.filename
         }
     
-    def get_chartjs_data(self, max_points=2000):
+    @profiled("analyzer.downsample")
+    def get_chartjs_data(self, max_points=2000, method="minmax", encoding="json"):
         return {
-            key: plot.to_chartjs(max_points)
+            key: plot.to_chartjs(max_points, method, encoding)
             for key, plot in self.plot_data.items()
         }
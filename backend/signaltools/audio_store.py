@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import os
+import re
+import struct
+import tempfile
+
+import numpy as np
+
+from signaltools.audio_analyzer import AudioAnalyzer
+from signaltools.cache import LRUByteCache
+from signaltools.profiling import profiled
+from signaltools.pyramid import EnvelopeBuilder, MinMaxPyramid
+from signaltools.spectrogram import spectrogram_tile
+from signaltools.wavinfo import WavStreamParser, read_wav_info
+
+AUDIO_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class InvalidAudio(ValueError):
+    """An upload the store refused because it is not a WAV file it can read."""
+
+
+def _iter_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    # Django uploads expose chunks(), plain file objects only read()
+    if hasattr(fileobj, "chunks"):
+        yield from fileobj.chunks(chunk_size)
+        return
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class AudioStore:
+    """Content-addressed WAV store with a process-wide decoded-sample cache.
+
+    Files are kept on disk under ``<root>/<sha256>.wav`` so uploading the same
+    bytes twice yields the same audio ID and a single copy. Decoded samples,
+    waveform pyramids, spectrogram tiles and resampled previews are held in
+    LRU caches bounded by their size in bytes.
+    """
+
+    def __init__(self, root, max_cache_bytes=DEFAULT_CACHE_BYTES,
+                 max_pyramid_bytes=DEFAULT_CACHE_BYTES // 4,
+                 max_tile_bytes=DEFAULT_CACHE_BYTES // 4,
+                 max_resampled_bytes=DEFAULT_CACHE_BYTES // 4, precision=None):
+        self.root = str(root)
+        # processing precision handed to every AudioAnalyzer (None = raw float64)
+        self.precision = precision
+        self.samples = LRUByteCache(max_cache_bytes)
+        self.pyramids = LRUByteCache(max_pyramid_bytes)
+        self.spectrogram_tiles = LRUByteCache(max_tile_bytes)
+        # AudioAnalyzer.resampled_channel results, e.g. plot previews
+        self.resampled = LRUByteCache(max_resampled_bytes)
+
+    @profiled("store.save")
+    def save(self, fileobj):
+        """Hash and store an uploaded file, returning its audio ID."""
+        ingest = self.ingest()
+        try:
+            for chunk in _iter_chunks(fileobj):
+                ingest.write(chunk)
+        except Exception:
+            ingest.abort()
+            raise
+        return ingest.commit()
+
+    def ingest(self):
+        """Start writing a file that arrives in chunks; see AudioIngest."""
+        return AudioIngest(self)
+
+    def exists(self, audio_id):
+        return bool(AUDIO_ID_PATTERN.match(audio_id or "")) and \
+            os.path.exists(self._path_for(audio_id))
+
+    def path(self, audio_id):
+        if not self.exists(audio_id):
+            raise KeyError(f"Unknown audio id: {audio_id}")
+        return self._path_for(audio_id)
+
+    def info(self, audio_id):
+        """Header metadata for ``audio_id``; never reads the sample data."""
+        return read_wav_info(self.path(audio_id))
+
+    @profiled("store.load")
+    def load(self, audio_id):
+        """Return an AudioAnalyzer for ``audio_id``, mapping the file at most once.
+
+        Samples are memory-mapped, so pages are only read from disk when a
+        computation touches them.
+        """
+        cached = self.samples.get(audio_id)
+        if cached is None:
+            analyzer = AudioAnalyzer(self.path(audio_id), mmap=True,
+                                     precision=self.precision)
+            # shared between requests, so guard against in-place edits
+            analyzer.y.setflags(write=False)
+            self.samples.put(audio_id, (analyzer.sr, analyzer.y))
+            logging.info("Mapped audio %s into cache", audio_id)
+        else:
+            sr, y = cached
+            analyzer = AudioAnalyzer.from_samples(sr, y, self._path_for(audio_id),
+                                                  precision=self.precision)
+        analyzer.resample_cache = self.resampled
+        return analyzer
+
+    @profiled("store.pyramid")
+    def pyramid(self, audio_id):
+        """Min/max waveform pyramid for ``audio_id``, built once and cached."""
+        pyramid = self.pyramids.get(audio_id)
+        if pyramid is None:
+            pyramid = MinMaxPyramid(self.load(audio_id).y)
+            self.pyramids.put(audio_id, pyramid)
+        return pyramid
+
+    @profiled("store.spectrogram_tile")
+    def spectrogram_tile(self, audio_id, params, tile_index):
+        """uint8 dB tile ``tile_index`` of the STFT described by ``params``.
+
+        Tiles are keyed by (audio id, params, tile index), so panning and
+        zooming within a recording only computes tiles not seen before.
+        """
+        key = (audio_id, params, tile_index)
+        tile = self.spectrogram_tiles.get(key)
+        if tile is None:
+            tile = spectrogram_tile(self.load(audio_id).y, params, tile_index)
+            tile.setflags(write=False)
+            self.spectrogram_tiles.put(key, tile)
+        return tile
+
+    def _path_for(self, audio_id):
+        return os.path.join(self.root, f"{audio_id}.wav")
+
+
+class AudioIngest:
+    """A file being written into an AudioStore as its bytes arrive.
+
+    Each chunk is hashed, written to a temporary file next to the store and
+    run through an incremental WAV parser whose samples feed the waveform
+    envelope. When the last chunk is in, ``commit`` renames the file into
+    place and caches its pyramid, so the audio ID, header and waveform
+    overview are ready without reading the file back. WAVs whose sample
+    format cannot be mapped directly are stored without the early envelope;
+    files without a readable WAV header are rejected.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.info = None
+        self.size = 0
+        os.makedirs(store.root, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.root, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self._digest = hashlib.sha256()
+        self._parser = WavStreamParser()
+        self._envelope = None
+        # sample bytes short of a whole frame
+        self._partial = b""
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self._digest.update(chunk)
+        self.size += len(chunk)
+        if self._parser is not None:
+            try:
+                self._add_samples(self._parser.feed(chunk))
+            except ValueError as e:
+                logging.info("No waveform envelope while ingesting: %s", e)
+                self._parser = self._envelope = None
+
+    def _add_samples(self, data):
+        if not data:
+            return
+        if self._envelope is None:
+            info = self._parser.info
+            if info.dtype is None or info.block_align == 0:
+                raise ValueError(f"unsupported sample format ({info.bits_per_sample} bit)")
+            self._envelope = EnvelopeBuilder(info.dtype)
+        info = self._parser.info
+        data = self._partial + data
+        n_frames = len(data) // info.block_align
+        self._partial = data[n_frames * info.block_align:]
+        if n_frames:
+            frames = np.frombuffer(data, dtype=info.dtype, count=n_frames * info.channels)
+            self._envelope.add(frames.reshape(n_frames, info.channels) if info.channels > 1
+                               else frames)
+
+    @profiled("store.commit")
+    def commit(self):
+        """Move the file into the store and return its audio ID.
+
+        Raises InvalidAudio, and discards the file, if it has no readable
+        WAV header.
+        """
+        try:
+            self._file.close()
+            try:
+                read_wav_info(self._tmp_path)
+            except (ValueError, struct.error) as e:
+                logging.info("Rejected upload: %s", e)
+                raise InvalidAudio("The uploaded file is not a readable WAV file")
+            audio_id = self._digest.hexdigest()
+            final_path = self.store._path_for(audio_id)
+            if os.path.exists(final_path):
+                os.remove(self._tmp_path)
+            else:
+                os.replace(self._tmp_path, final_path)
+        except Exception:
+            self.abort()
+            raise
+        if self._parser is not None:
+            try:
+                self.info = self._parser.finish()
+            except ValueError as e:
+                logging.info("No waveform envelope for %s: %s", audio_id, e)
+        if self._envelope is not None and self.info is not None \
+                and audio_id not in self.store.pyramids:
+            y = self.store.load(audio_id).y
+            self.store.pyramids.put(audio_id, MinMaxPyramid(
+                y, base_bucket=self._envelope.base_bucket, base_level=self._envelope.finish()))
+        return audio_id
+
+    def abort(self):
+        """Discard a partial upload."""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
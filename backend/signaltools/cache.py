@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+
+
+def nbytes_of(value):
+    # Best effort size of a cached value: arrays and other objects with an
+    # ``nbytes`` attribute report it, tuples/lists are summed, anything else
+    # counts as zero bytes
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes_of(v) for v in value)
+    return int(getattr(value, "nbytes", 0))
+
+
+class LRUByteCache:
+    """Thread-safe LRU mapping bounded by the total byte size of its values."""
+
+    def __init__(self, max_bytes, sizeof=nbytes_of):
+        self.max_bytes = int(max_bytes)
+        self._sizeof = sizeof
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value, nbytes=None):
+        size = self._sizeof(value) if nbytes is None else int(nbytes)
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            # values larger than the whole budget are never cached
+            if size > self.max_bytes:
+                return value
+            self._items[key] = value
+            self._sizes[key] = size
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._items))
+                self._remove(oldest)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            value = self._items[key]
+            self._remove(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        del self._items[key]
+        self.current_bytes -= self._sizes.pop(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
@@ -0,0 +1,57 @@
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+
+def minmax_indices(y, max_points):
+    """Indices of the min and max of each bucket, in time order.
+
+    Buckets hold ``len(y) // (max_points // 2)`` samples (the last one may be
+    partial) and contribute two points each, matching the original per-bucket
+    loop in PlotData but computed with one reshape over the full buckets.
+    """
+    y = np.asarray(y)
+    n = len(y)
+    bucket_size = max(n // max(max_points // 2, 1), 1)
+    n_full = n // bucket_size
+    full = y[:n_full * bucket_size].reshape(n_full, bucket_size)
+    starts = np.arange(n_full) * bucket_size
+    idx_min = starts + np.argmin(full, axis=1)
+    idx_max = starts + np.argmax(full, axis=1)
+    if n_full * bucket_size < n:
+        tail = y[n_full * bucket_size:]
+        idx_min = np.append(idx_min, n_full * bucket_size + np.argmin(tail))
+        idx_max = np.append(idx_max, n_full * bucket_size + np.argmax(tail))
+    # the earlier of the two comes first; ties keep the max first as before
+    first = np.where(idx_min < idx_max, idx_min, idx_max)
+    second = np.where(idx_min < idx_max, idx_max, idx_min)
+    return np.column_stack((first, second)).ravel()
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets selection of ``n_out`` point indices."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # interior buckets cover samples 1..n-2; first and last points are kept
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # the bucket after the last interior one is the final point itself
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
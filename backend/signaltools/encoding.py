@@ -0,0 +1,55 @@
+import base64
+
+import numpy as np
+
+PAYLOAD_ENCODINGS = ("json", "base64")
+
+
+def encode_array(values, dtype="<f4"):
+    """Pack an array as a base64 little-endian typed array (float32 by default).
+
+    Decodes in the browser with e.g. ``new Float32Array(bytes.buffer)``.
+    """
+    values = np.ascontiguousarray(values, dtype=np.dtype(dtype))
+    return {
+        "dtype": values.dtype.name,
+        "length": len(values),
+        "data": base64.b64encode(values.tobytes()).decode("ascii")
+    }
+
+
+def uniform_step(x, chunk_size=1 << 16):
+    # Returns (start, step) when x is an evenly spaced grid, otherwise None.
+    # Compared chunk by chunk so long time axes need no full-size temporaries
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) < 2:
+        return (float(x[0]), 0.0) if len(x) else None
+    start = x[0]
+    step = (x[-1] - start) / (len(x) - 1)
+    tolerance = abs(step) * 1e-6
+    offsets = np.arange(chunk_size) * step
+    for i in range(0, len(x), chunk_size):
+        chunk = x[i:i + chunk_size]
+        if np.abs(chunk - (start + i * step) - offsets[:len(chunk)]).max() > tolerance:
+            return None
+    return float(start), float(step)
+
+
+def encode_axis(x, indices=None):
+    """Describe an x axis compactly.
+
+    Evenly spaced axes become ``{start, step, length}``. When ``indices`` picks
+    a subset of an evenly spaced axis (as the downsamplers do), the uniform
+    grid is sent with the uint32 indices, so the values stay exact. Any other
+    axis falls back to a float32 typed array.
+    """
+    grid = uniform_step(x)
+    if grid is not None:
+        start, step = grid
+        if indices is None:
+            return {"start": start, "step": step, "length": len(x)}
+        return {"start": start, "step": step,
+                "index": encode_array(indices, dtype="<u4")}
+    if indices is not None:
+        x = np.asarray(x)[indices]
+    return encode_array(x)
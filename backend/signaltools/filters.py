@@ -0,0 +1,251 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Tuple, Union
+
+import numpy as np
+import scipy.signal
+
+from signaltools.convolution import fir_filter, stream_fir
+from signaltools.streaming import iter_blocks, stream_sosfilt
+
+BAND_TYPES = ("band", "bandstop")
+FILTER_TYPES = ("low", "high") + BAND_TYPES
+# "butter" is an IIR in second-order sections; the FIR designs are
+# linear-phase, windowed-sinc ("fir_window") or equiripple ("fir_remez")
+FILTER_DESIGNS = ("butter", "fir_window", "fir_remez")
+# "zero" runs IIR designs forwards and backwards (sosfiltfilt) and removes
+# the group delay of FIR designs
+FILTER_PHASES = ("causal", "zero")
+
+_FIRWIN_PASS_ZERO = {"low": "lowpass", "high": "highpass",
+                     "band": "bandpass", "bandstop": "bandstop"}
+# remez transition bands span this fraction of the distance from each
+# cutoff to its nearest neighbouring edge (0, Nyquist or the other cutoff)
+REMEZ_TRANSITION = 0.2
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """A filter design shared via design_filter.
+
+    Butterworth designs carry second-order sections in ``sos``; FIR designs
+    carry their coefficients in ``taps`` and have ``sos`` set to None.
+    """
+    filter_type: str
+    order: int
+    cutoff: Union[float, Tuple[float, float]]
+    sr: int
+    sos: np.ndarray = field(compare=False, repr=False)
+    design: str = "butter"
+    phase: str = "causal"
+    taps: np.ndarray = field(default=None, compare=False, repr=False)
+
+    @property
+    def is_fir(self):
+        return self.taps is not None
+
+    @property
+    def streamable(self):
+        # sosfiltfilt needs the whole signal for its backward pass
+        return self.is_fir or self.phase == "causal"
+
+    def frequency_response(self, worN=512):
+        # Returns (frequencies in Hz, complex response); zero-phase responses
+        # are real: |H|^2 for filtfilt, delay-compensated H for FIR designs
+        if self.is_fir:
+            w, h = scipy.signal.freqz(self.taps, worN=worN, fs=self.sr)
+            if self.phase == "zero":
+                delay = (len(self.taps) - 1) // 2
+                h = (h * np.exp(2j * np.pi * w / self.sr * delay)).real
+            return w, h
+        w, h = scipy.signal.sosfreqz(self.sos, worN=worN, fs=self.sr)
+        if self.phase == "zero":
+            h = np.abs(h) ** 2
+        return w, h
+
+    def taps_as(self, dtype=None):
+        return self.taps if dtype is None else self.taps.astype(dtype, copy=False)
+
+    def apply(self, y, dtype=None):
+        # With a dtype (e.g. float32) the output is stored in it, but IIR
+        # sections and their state stay float64: the recursion amplifies
+        # rounding errors in them, most for high orders and low cutoffs
+        if self.is_fir:
+            return fir_filter(self.taps_as(dtype), y, zero_phase=self.phase == "zero")
+        if self.phase == "zero":
+            return _stored_as(scipy.signal.sosfiltfilt(self.sos, y, axis=0), dtype)
+        if dtype is None:
+            return scipy.signal.sosfilt(self.sos, y, axis=0)
+        # block by block, so the float64 output never exceeds one block
+        out = np.empty(y.shape, dtype)
+        start = 0
+        for block in stream_sosfilt(self.sos, iter_blocks(y)):
+            out[start:start + len(block)] = block
+            start += len(block)
+        return out
+
+    def stream(self, blocks, dtype=None):
+        """Filter consecutive blocks, yielding one output block per input block.
+
+        Zero-phase Butterworth filtering is not causal, so those blocks are
+        gathered and filtered in one piece (memory grows with the signal).
+        """
+        if self.is_fir:
+            return stream_fir(self.taps_as(dtype), blocks, zero_phase=self.phase == "zero")
+        if not self.streamable:
+            blocks = list(blocks)
+            return iter([self.apply(np.concatenate(blocks), dtype)] if blocks else [])
+        return (_stored_as(block, dtype) for block in stream_sosfilt(self.sos, blocks))
+
+    def impulse_response(self, threshold=1e-6, max_length=None, block_size=4096):
+        """Impulse response as ``(times in seconds, response)``.
+
+        Causal responses start at t=0 and are computed only until they have
+        decayed: blocks are filtered until one stays below ``threshold``
+        times the peak magnitude, or until ``max_length`` samples, and
+        trailing samples under the threshold are trimmed. Zero-phase
+        responses are two-sided and centred on t=0: FIR taps without their
+        group delay, or the sections run forwards and backwards over a
+        centred impulse.
+        """
+        if self.is_fir:
+            return self._fir_impulse_response(max_length)
+        response = self._decayed_response(threshold, max_length, block_size)
+        if self.phase == "causal":
+            return np.arange(len(response)) / self.sr, response
+        # the forward pass of filtfilt decays within len(response) samples,
+        # so the backward pass spreads as far before the impulse
+        centre = len(response) - 1
+        impulse = np.zeros(2 * len(response) - 1)
+        impulse[centre] = 1.0
+        # sosfiltfilt's passes, but from rest: its edge initial conditions
+        # assume a steady signal and would leak into the response
+        forward = scipy.signal.sosfilt(self.sos, impulse)
+        response = scipy.signal.sosfilt(self.sos, forward[::-1])[::-1]
+        above = np.nonzero(np.abs(response) >= threshold * np.max(np.abs(response)))[0]
+        half = int(np.max(np.abs(above - centre))) if len(above) else 0
+        return (np.arange(-half, half + 1) / self.sr,
+                response[centre - half:centre + half + 1])
+
+    def _fir_impulse_response(self, max_length=None):
+        # FIR responses are their taps, centred on t=0 when zero-phase
+        if self.phase == "causal":
+            response = self.taps[:max_length]
+            return np.arange(len(response)) / self.sr, response
+        delay = (len(self.taps) - 1) // 2
+        half = delay if max_length is None else min(delay, max(int(max_length) - 1, 0) // 2)
+        return (np.arange(-half, half + 1) / self.sr,
+                self.taps[delay - half:delay + half + 1])
+
+    def _decayed_response(self, threshold, max_length, block_size):
+        # Causal IIR impulse response, filtered block by block until decayed
+        if max_length is None:
+            max_length = 60 * self.sr
+        max_length = max(int(max_length), 1)
+        zi = np.zeros((self.sos.shape[0], 2))
+        block = np.zeros(min(block_size, max_length))
+        block[0] = 1.0
+        blocks, total, peak = [], 0, 0.0
+        while total < max_length:
+            block = block[:max_length - total]
+            out, zi = scipy.signal.sosfilt(self.sos, block, zi=zi)
+            blocks.append(out)
+            total += len(out)
+            block_peak = np.max(np.abs(out))
+            if total > len(out) and block_peak < threshold * peak:
+                break
+            peak = max(peak, block_peak)
+            block = np.zeros(block_size)
+        response = np.concatenate(blocks)
+        above = np.nonzero(np.abs(response) >= threshold * peak)[0]
+        end = above[-1] + 1 if len(above) else 1
+        return response[:end]
+
+
+def _stored_as(samples, dtype=None):
+    return samples if dtype is None else samples.astype(dtype, copy=False)
+
+
+def normalize_filter_params(filter_type, order, cutoff):
+    # Validates and canonicalises user input so equal filters share a cache key
+    filter_type = str(filter_type).lower()
+    if filter_type not in FILTER_TYPES:
+        raise ValueError(
+            "filter_type must be 'high', 'low', 'band', or 'bandstop'")
+    if filter_type in BAND_TYPES:
+        if not isinstance(cutoff, (tuple, list)) or len(cutoff) != 2:
+            raise ValueError(
+                f"Cutoff for '{filter_type}' type must be a tuple (low, high)")
+        cutoff = (float(cutoff[0]), float(cutoff[1]))
+    else:
+        if isinstance(cutoff, (tuple, list)):
+            raise ValueError(
+                f"Cutoff for '{filter_type}' type must be a single frequency")
+        cutoff = float(cutoff)
+    order = int(order)
+    if order < 1:
+        raise ValueError("order must be a positive integer")
+    return filter_type, order, cutoff
+
+
+def normalize_design_params(design, phase):
+    design = str(design or "butter").lower()
+    phase = str(phase or "causal").lower()
+    if design not in FILTER_DESIGNS:
+        raise ValueError(f"design must be one of {FILTER_DESIGNS}")
+    if phase not in FILTER_PHASES:
+        raise ValueError(f"phase must be one of {FILTER_PHASES}")
+    return design, phase
+
+
+def _remez_bands(filter_type, cutoff, sr):
+    # Band edges and desired gains for an equiripple design around cutoff
+    nyquist = sr / 2
+    edges = list(cutoff) if isinstance(cutoff, tuple) else [cutoff]
+    neighbours = [0.0] + edges + [nyquist]
+    bands = [0.0]
+    for i, edge in enumerate(edges):
+        gap = min(edge - neighbours[i], neighbours[i + 2] - edge)
+        half = REMEZ_TRANSITION * gap / 2
+        bands += [edge - half, edge + half]
+    bands.append(nyquist)
+    desired = {"low": [1, 0], "high": [0, 1],
+               "band": [0, 1, 0], "bandstop": [1, 0, 1]}[filter_type]
+    return bands, desired
+
+
+def _design_fir(filter_type, numtaps, cutoff, sr, design):
+    if design == "fir_window":
+        return scipy.signal.firwin(numtaps, cutoff, pass_zero=_FIRWIN_PASS_ZERO[filter_type],
+                                   fs=sr)
+    bands, desired = _remez_bands(filter_type, cutoff, sr)
+    return scipy.signal.remez(numtaps, bands, desired, fs=sr)
+
+
+@lru_cache(maxsize=256)
+def _design(filter_type, order, cutoff, sr, design="butter", phase="causal"):
+    # the same sos/taps arrays are handed to every caller and must not be
+    # modified (they are not flagged read-only because sosfilt rejects
+    # read-only buffers)
+    if design == "butter":
+        sos = scipy.signal.butter(order, cutoff, btype=filter_type, fs=sr,
+                                  output='sos')
+        return FilterSpec(filter_type, order, cutoff, sr, sos, design, phase)
+    taps = _design_fir(filter_type, order + 1, cutoff, sr, design)
+    return FilterSpec(filter_type, order, cutoff, sr, None, design, phase, taps)
+
+
+def design_filter(filter_type, order, cutoff, sr, design="butter", phase="causal"):
+    """Design (or fetch from the LRU cache) a filter.
+
+    Cutoffs are in Hz; band types take a ``(low, high)`` tuple. For FIR
+    designs ``order`` is the number of taps minus one and is rounded up to
+    an even number, so every FIR has an odd, symmetric set of taps and an
+    integer group delay of ``order / 2`` samples.
+    """
+    filter_type, order, cutoff = normalize_filter_params(
+        filter_type, order, cutoff)
+    design, phase = normalize_design_params(design, phase)
+    if design != "butter":
+        order += order % 2
+    return _design(filter_type, order, cutoff, int(sr), design, phase)
@@ -0,0 +1,13 @@
+"""Local audio playback through sounddevice, imported on first use only.
+
+sounddevice loads PortAudio when imported, which fails on headless hosts,
+so nothing on the server import path may depend on this module.
+"""
+
+
+def play(data, sr):
+    try:
+        import sounddevice as sd
+    except (ImportError, OSError) as e:
+        raise RuntimeError(f"Audio playback is unavailable: {e}") from e
+    sd.play(data=data, samplerate=sr)
@@ -0,0 +1,31 @@
+"""Interactive matplotlib windows for local use of AudioAnalyzer.
+
+pyplot is imported on first use only, so the server never pays for GUI
+backend setup.
+"""
+import numpy as np
+
+
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def show_line_plot(title, x, y, x_label, y_label):
+    plt = _pyplot()
+    plt.plot(x, y)
+    plt.title(title)
+    plt.xlabel(x_label)
+    plt.ylabel(y_label)
+    plt.grid()
+    plt.show()
+
+
+def show_spectrogram(t, f, Sxx, title):
+    plt = _pyplot()
+    plt.pcolormesh(t, f, 10 * np.log10(Sxx))
+    plt.ylabel('Frequency [Hz]')
+    plt.xlabel('Time [sec]')
+    plt.title(title)
+    plt.colorbar(label='Intensity [dB]')
+    plt.show()
@@ -0,0 +1,162 @@
+"""Lightweight timing and peak-memory spans for the analysis pipeline.
+
+``with span("name"):`` (or the ``@profiled("name")`` decorator) times a
+stage. Every span is added to the process-wide ``registry``, which renders
+Prometheus text, and to the spans collected for the current request (see
+``collect``), which a middleware turns into a Server-Timing header.
+
+Peak memory comes from tracemalloc, which NumPy reports its buffers to. It
+is only measured while tracing is on (``enable_memory_tracing``) because
+tracing slows allocations down. Tracing is process-wide, so with concurrent
+requests a span's peak can include allocations made by other threads.
+"""
+import functools
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# spans of the current request, and the stack of open spans' memory peaks
+_collected = ContextVar("profiling_spans", default=None)
+_open_peaks = ContextVar("profiling_open_peaks", default=())
+
+
+class SpanStats:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_peak_bytes = 0
+
+    def observe(self, seconds, peak_bytes):
+        self.count += 1
+        self.total_seconds += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+        if peak_bytes is not None:
+            self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+
+
+class MetricsRegistry:
+    """Thread-safe per-span latency histograms and peak memory."""
+
+    def __init__(self, prefix="audio_analyzer", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, peak_bytes=None):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = SpanStats(self.buckets)
+            stats.observe(seconds, peak_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+    def render_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        seconds = f"{self.prefix}_span_seconds"
+        peak = f"{self.prefix}_span_peak_bytes"
+        lines = [f"# HELP {seconds} Wall time of instrumented pipeline stages.",
+                 f"# TYPE {seconds} histogram"]
+        with self._lock:
+            items = sorted(self._stats.items())
+            for name, stats in items:
+                label = f'span="{name}"'
+                for bound, count in zip(stats.buckets, stats.bucket_counts):
+                    lines.append(f'{seconds}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{seconds}_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f"{seconds}_sum{{{label}}} {stats.total_seconds}")
+                lines.append(f"{seconds}_count{{{label}}} {stats.count}")
+            lines += [f"# HELP {peak} Largest traced allocation peak seen in a stage.",
+                      f"# TYPE {peak} gauge"]
+            for name, stats in items:
+                lines.append(f'{peak}{{span="{name}"}} {stats.max_peak_bytes}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def enable_memory_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+@contextmanager
+def span(name):
+    """Time (and, while tracing, measure the peak memory of) a block."""
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        start_bytes, outer_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        # a child span resets the peak too, so each open span keeps the
+        # largest peak its children reported
+        peaks = [0]
+        token = _open_peaks.set(_open_peaks.get() + (peaks,))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak_bytes = None
+        if tracing:
+            _open_peaks.reset(token)
+            absolute_peak = max(tracemalloc.get_traced_memory()[1], peaks[0])
+            peak_bytes = max(absolute_peak - start_bytes, 0)
+            parents = _open_peaks.get()
+            if parents:
+                parents[-1][0] = max(parents[-1][0], absolute_peak, outer_peak)
+        registry.observe(name, seconds, peak_bytes)
+        collected = _collected.get()
+        if collected is not None:
+            collected.append((name, seconds, peak_bytes))
+
+
+def profiled(name):
+    """Decorator form of span."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def collect():
+    """Gather the ``(name, seconds, peak_bytes)`` spans finished inside the block."""
+    spans = []
+    token = _collected.set(spans)
+    try:
+        yield spans
+    finally:
+        _collected.reset(token)
+
+
+def server_timing(spans):
+    """Server-Timing header value; repeated span names are summed."""
+    totals = {}
+    for name, seconds, peak_bytes in spans:
+        total, peak = totals.get(name, (0.0, None))
+        if peak_bytes is not None:
+            peak = max(peak or 0, peak_bytes)
+        totals[name] = (total + seconds, peak)
+    entries = []
+    for name, (seconds, peak) in totals.items():
+        entry = f"{name};dur={seconds * 1000:.2f}"
+        if peak is not None:
+            entry += f';desc="peak {peak / 1e6:.1f}MB"'
+        entries.append(entry)
+    return ", ".join(entries)
@@ -0,0 +1,123 @@
+"""Progressive filtering: cheap previews on decimated copies, then full resolution.
+
+A recording is kept as a ladder of anti-aliased, decimated copies. Filtering
+the coarsest copy takes a few milliseconds whatever the recording's length,
+so a preview of new filter settings is ready almost at once. Each finer level
+then refines it, up to the full-resolution result. Filters with cutoffs too
+close to Nyquist for any decimated copy are previewed on short full-rate
+excerpts spread over the recording instead.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from signaltools.filters import design_filter
+from signaltools.resample import StreamingResampler
+from signaltools.streaming import DEFAULT_BLOCK_SIZE, iter_blocks
+
+# each level of the ladder has at most 1/LADDER_FACTOR the samples of the one
+# above: the largest factor up to this that divides the level's sample rate
+LADDER_FACTOR = 8
+# the coarsest level has at most this many samples
+PREVIEW_SAMPLES = 1 << 16
+# a decimated level is only used when its Nyquist frequency is this many
+# times the highest cutoff, so the filter's transition band fits below it
+NYQUIST_MARGIN = 1.25
+# excerpt previews: samples kept per excerpt, and the minimum context filtered
+# on either side of them so the filter's transients have died out
+EXCERPT_SAMPLES = 64
+EXCERPT_WARMUP = 512
+
+
+class Refinement(NamedTuple):
+    kind: str  # "decimated", "excerpts" or "full"
+    decimation: int
+    times: np.ndarray
+    filtered: np.ndarray
+
+
+def decimation_ladder(x, sr, preview_samples=PREVIEW_SAMPLES, factor=LADDER_FACTOR):
+    """``[(decimation, sample rate, samples)]`` from the coarsest copy up to ``x``.
+
+    Each level is decimated from the one above, a block at a time, by a
+    StreamingResampler, which low-pass filters it first. The factor is the
+    largest one up to ``factor`` that divides the level's rate, so every
+    level has an exact integer sample rate (44100 Hz steps down by 7, for
+    instance); the ladder stops when no factor above 1 does. Float input
+    keeps its precision.
+    """
+    levels = [(1, int(sr), x)]
+    while len(levels[-1][2]) > preview_samples:
+        decimation, level_sr, y = levels[-1]
+        step = next((f for f in range(factor, 1, -1) if level_sr % f == 0), None)
+        if step is None:
+            break
+        coarser = np.concatenate(list(StreamingResampler(1, step).stream(iter_blocks(y))))
+        levels.append((decimation * step, level_sr // step, coarser))
+    return levels[::-1]
+
+
+def _highest_cutoff(cutoff):
+    return max(cutoff) if isinstance(cutoff, tuple) else cutoff
+
+
+def excerpt_preview(x, sr, spec, n_excerpts, dtype=None, keep=EXCERPT_SAMPLES):
+    """``(times, filtered)`` of short full-rate excerpts spread evenly over ``x``.
+
+    Each excerpt is filtered with enough context on both sides for the
+    filter to settle (zero-phase filters run backwards too), and all of
+    them go through one batched call, so the cost does not grow with the
+    length of ``x``.
+    """
+    warmup = max(EXCERPT_WARMUP, len(spec.taps) if spec.is_fir else 0)
+    span = keep + 2 * warmup
+    n_excerpts = min(n_excerpts, len(x) // span)
+    if n_excerpts < 1:
+        return np.arange(len(x)) / sr, spec.apply(np.asarray(x), dtype)
+    starts = np.linspace(0, len(x) - span, n_excerpts).astype(np.int64)
+    # (span, n_excerpts): one excerpt per column, filtered along axis 0
+    index = starts + np.arange(span)[:, None]
+    filtered = spec.apply(np.asarray(x)[index], dtype)[warmup:warmup + keep]
+    return (index[warmup:warmup + keep] / sr).T.ravel(), filtered.T.ravel()
+
+
+def progressive_filter(levels, filter_type, order, cutoff, design="butter", phase="causal",
+                       dtype=None, cancelled=None, excerpts=1000, block_size=DEFAULT_BLOCK_SIZE):
+    """Filter each level of a ladder in turn, yielding Refinements.
+
+    Decimated levels whose Nyquist frequency is too close to the cutoff are
+    skipped; if that leaves no preview of a long signal, ``excerpts``
+    full-rate excerpts are filtered first instead. The full-resolution
+    result always comes last. The generator stops early once
+    ``cancelled()`` returns True, which is checked before each stage and
+    between the blocks of the full-resolution pass. ``dtype`` is the
+    processing precision, as for FilterSpec.apply.
+    """
+    cancelled = cancelled or (lambda: False)
+    previewed = False
+    for decimation, sr, x in levels:
+        if cancelled():
+            return
+        if decimation > 1 and sr / 2 < NYQUIST_MARGIN * _highest_cutoff(cutoff):
+            continue
+        spec = design_filter(filter_type, order, cutoff, sr, design, phase)
+        if decimation > 1:
+            previewed = True
+            yield Refinement("decimated", decimation, np.arange(len(x)) / sr, spec.apply(x, dtype))
+            continue
+        if not previewed and len(x) > len(levels[0][2]):
+            times, filtered = excerpt_preview(x, sr, spec, excerpts, dtype)
+            yield Refinement("excerpts", 1, times, filtered)
+            if cancelled():
+                return
+        if not spec.streamable:
+            filtered = spec.apply(x, dtype)
+        else:
+            blocks = (np.asarray(x[i:i + block_size]) for i in range(0, len(x), block_size))
+            filtered = []
+            for block in spec.stream(blocks, dtype):
+                if cancelled():
+                    return
+                filtered.append(block)
+            filtered = np.concatenate(filtered) if filtered else spec.apply(x, dtype)
+        yield Refinement("full", 1, np.arange(len(x)) / sr, filtered)
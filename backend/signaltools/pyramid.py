@@ -0,0 +1,138 @@
+import numpy as np
+
+from signaltools.streaming import DEFAULT_BLOCK_SIZE
+
+DEFAULT_BASE_BUCKET = 16
+
+
+def frame_extremes(block):
+    """Per-frame min and max across channels of a ``(frames[, channels])`` block."""
+    if block.ndim == 1:
+        return block, block
+    # column by column: far faster than reducing along the short channel axis
+    lo = block[:, 0].copy()
+    hi = lo.copy()
+    for c in range(1, block.shape[1]):
+        np.minimum(lo, block[:, c], out=lo)
+        np.maximum(hi, block[:, c], out=hi)
+    return lo, hi
+
+
+class MinMaxPyramid:
+    """Min/max envelopes of a signal at resolutions halving level by level.
+
+    Level 0 summarises ``base_bucket`` samples per entry and each further
+    level merges pairs of entries of the level below. Multichannel input is
+    reduced across channels, so the envelope covers every channel. A window
+    query picks the coarsest level that still has at least one entry per
+    pixel, so zooming and panning cost O(pixels) rather than O(samples).
+    A ``base_level`` already built from the samples (see EnvelopeBuilder)
+    skips the pass over ``y``.
+    """
+
+    def __init__(self, y, base_bucket=DEFAULT_BASE_BUCKET, block_size=DEFAULT_BLOCK_SIZE,
+                 base_level=None):
+        self.y = y
+        self.n_samples = len(y)
+        self.base_bucket = int(base_bucket)
+        if base_level is None:
+            mins, maxs = self._base_level(y, block_size)
+        else:
+            mins, maxs = base_level
+        self.levels = [(mins, maxs)]
+        while len(mins) > 1:
+            mins, maxs = self._halve(mins, np.minimum), self._halve(maxs, np.maximum)
+            self.levels.append((mins, maxs))
+
+    def _base_level(self, y, block_size):
+        # Built block by block so a memory-mapped signal is never fully loaded
+        block_size -= block_size % self.base_bucket
+        mins, maxs = [], []
+        for start in range(0, len(y), block_size):
+            block_min, block_max = frame_extremes(np.asarray(y[start:start + block_size]))
+            n_full = len(block_min) // self.base_bucket
+            if n_full:
+                shape = (n_full, self.base_bucket)
+                mins.append(block_min[:n_full * self.base_bucket].reshape(shape).min(axis=1))
+                maxs.append(block_max[:n_full * self.base_bucket].reshape(shape).max(axis=1))
+            if n_full * self.base_bucket < len(block_min):
+                mins.append(block_min[n_full * self.base_bucket:].min(keepdims=True))
+                maxs.append(block_max[n_full * self.base_bucket:].max(keepdims=True))
+        if not mins:
+            empty = np.empty(0, dtype=y.dtype)
+            return empty, empty
+        return np.concatenate(mins), np.concatenate(maxs)
+
+    @staticmethod
+    def _halve(values, reduce):
+        paired = reduce(values[0:len(values) - 1:2], values[1::2])
+        if len(values) % 2:
+            paired = np.append(paired, values[-1])
+        return paired
+
+    @property
+    def nbytes(self):
+        return sum(mins.nbytes + maxs.nbytes for mins, maxs in self.levels)
+
+    def bucket_size(self, level):
+        return self.base_bucket << level
+
+    def window(self, start, stop, width):
+        """Envelope of samples ``[start, stop)`` at roughly ``width`` pixels.
+
+        Returns ``(level, bucket_size, first_index, mins, maxs)``. Level -1
+        means the window is narrow enough to return the raw samples.
+        """
+        # clamped to the signal, so a window outside it is empty
+        start = min(max(int(start), 0), self.n_samples)
+        stop = max(min(int(stop), self.n_samples), start)
+        width = max(int(width), 1)
+        samples_per_pixel = (stop - start) / width
+        if samples_per_pixel < self.base_bucket:
+            mins, maxs = frame_extremes(np.asarray(self.y[start:stop]))
+            return -1, 1, start, mins, maxs
+        level = min(int(np.log2(samples_per_pixel / self.base_bucket)), len(self.levels) - 1)
+        bucket = self.bucket_size(level)
+        first, last = start // bucket, -(-stop // bucket)
+        mins, maxs = self.levels[level]
+        return level, bucket, first * bucket, mins[first:last], maxs[first:last]
+
+
+class EnvelopeBuilder:
+    """MinMaxPyramid's base level, built from frames fed in order.
+
+    Gives the same ``(mins, maxs)`` as the pyramid computes from the whole
+    signal, so an envelope can be built while a file is still arriving.
+    """
+
+    def __init__(self, dtype, base_bucket=DEFAULT_BASE_BUCKET):
+        self.dtype = np.dtype(dtype)
+        self.base_bucket = int(base_bucket)
+        self._mins, self._maxs = [], []
+        # per-frame extremes of a bucket that is not complete yet
+        self._pending_min = self._pending_max = np.empty(0, dtype=self.dtype)
+
+    def add(self, frames):
+        frame_min, frame_max = frame_extremes(np.asarray(frames))
+        if len(self._pending_min):
+            frame_min = np.concatenate([self._pending_min, frame_min])
+            frame_max = np.concatenate([self._pending_max, frame_max])
+        n_full = len(frame_min) // self.base_bucket
+        if n_full:
+            shape = (n_full, self.base_bucket)
+            self._mins.append(frame_min[:n_full * self.base_bucket].reshape(shape).min(axis=1))
+            self._maxs.append(frame_max[:n_full * self.base_bucket].reshape(shape).max(axis=1))
+        # copied, as the frames may be a view of a buffer that is reused
+        self._pending_min = frame_min[n_full * self.base_bucket:].copy()
+        self._pending_max = frame_max[n_full * self.base_bucket:].copy()
+
+    def finish(self):
+        """``(mins, maxs)`` of everything added, the last bucket possibly partial."""
+        mins, maxs = list(self._mins), list(self._maxs)
+        if len(self._pending_min):
+            mins.append(self._pending_min.min(keepdims=True))
+            maxs.append(self._pending_max.max(keepdims=True))
+        if not mins:
+            empty = np.empty(0, dtype=self.dtype)
+            return empty, empty
+        return np.concatenate(mins), np.concatenate(maxs)
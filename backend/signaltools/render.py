@@ -0,0 +1,78 @@
+import struct
+import zlib
+
+import numpy as np
+
+DEFAULT_WAVE_COLOR = (31, 119, 180)
+DEFAULT_BACKGROUND = (255, 255, 255)
+
+
+def waveform_envelope(y, width, per_channel=False):
+    """Column-wise min and max of ``y`` for an image ``width`` pixels wide.
+
+    Multichannel signals are reduced across channels unless ``per_channel``
+    is set, in which case ``(width, channels)`` arrays are returned. Works
+    directly on memory-mapped arrays without a full-length temporary.
+    """
+    n = len(y)
+    if n == 0:
+        shape = (width,) + (y.shape[1:] if per_channel else ())
+        return np.zeros(shape), np.zeros(shape)
+    edges = np.linspace(0, n, width + 1).astype(np.int64)[:-1]
+    mins = np.minimum.reduceat(y, edges, axis=0).astype(np.float64)
+    maxs = np.maximum.reduceat(y, edges, axis=0).astype(np.float64)
+    if mins.ndim > 1 and not per_channel:
+        mins, maxs = mins.min(axis=1), maxs.max(axis=1)
+    return mins, maxs
+
+
+def encode_png(rgb):
+    """Encode an ``(height, width, 3)`` uint8 array as PNG bytes."""
+    height, width, _ = rgb.shape
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    # every scanline starts with filter type 0 (none)
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + chunk(b"IEND", b""))
+
+
+def rasterize_envelope(mins, maxs, height=300, color=DEFAULT_WAVE_COLOR,
+                       background=DEFAULT_BACKGROUND):
+    """Rasterize a min/max envelope (values in [-1, 1]) to an RGB array."""
+    scale = (height - 1) / 2
+    top = np.round((1 - np.clip(maxs, -1, 1)) * scale).astype(np.int64)
+    bottom = np.round((1 - np.clip(mins, -1, 1)) * scale).astype(np.int64)
+    rows = np.arange(height)[:, None]
+    mask = (rows >= top[None, :]) & (rows <= bottom[None, :])
+    image = np.where(mask[:, :, None], np.array(color, dtype=np.uint8),
+                     np.array(background, dtype=np.uint8))
+    return image.astype(np.uint8)
+
+
+def render_waveform_png(y, width=1000, height=300, normalize=True, **style):
+    """Render a waveform image without matplotlib.
+
+    Each channel gets its own horizontal lane and, with ``normalize``, is
+    scaled by its own peak. Uses only NumPy and zlib, holds no global state
+    and is safe to call from several threads at once.
+    """
+    mins, maxs = waveform_envelope(y, width, per_channel=True)
+    if mins.ndim == 1:
+        mins, maxs = mins[:, None], maxs[:, None]
+    if normalize:
+        peak = np.maximum(np.abs(mins).max(axis=0), np.abs(maxs).max(axis=0))
+        peak[peak == 0] = 1
+        mins, maxs = mins / peak, maxs / peak
+    channels = mins.shape[1]
+    # the last lane absorbs any rows left over by the integer division
+    lane_heights = [height // channels] * channels
+    lane_heights[-1] += height - sum(lane_heights)
+    lanes = [rasterize_envelope(mins[:, c], maxs[:, c], height=h, **style)
+             for c, h in enumerate(lane_heights) if h > 0]
+    return encode_png(np.vstack(lanes))
@@ -0,0 +1,121 @@
+"""Polyphase sample rate conversion in chunks, with state carried between them.
+
+StreamingResampler produces the same samples as one
+``scipy.signal.resample_poly`` call over the whole signal, but takes the
+signal a block at a time: only the filter's history is kept between blocks,
+so a long (or memory-mapped) recording can be converted with bounded memory,
+and the work after conversion scales with the output rate.
+"""
+import math
+
+import numpy as np
+import scipy.signal
+
+# up/down factors above this need anti-aliasing filters too long to be
+# practical (e.g. 44100 -> 44099 Hz); resample_poly has the same limit
+MAX_RATE_FACTOR = 1000
+
+
+def rate_factors(sr, target_sr):
+    """``(up, down)`` in lowest terms converting ``sr`` to ``target_sr``."""
+    sr, target_sr = int(sr), int(target_sr)
+    if sr <= 0 or target_sr <= 0:
+        raise ValueError("Sample rates must be positive")
+    g = math.gcd(sr, target_sr)
+    up, down = target_sr // g, sr // g
+    if max(up, down) > MAX_RATE_FACTOR:
+        raise ValueError(f"Cannot convert {sr} Hz to {target_sr} Hz: the rates' ratio "
+                         f"{up}/{down} is too fine")
+    return up, down
+
+
+def resampled_length(n, up, down):
+    # Same output length as resample_poly: ceil(n * up / down)
+    return -(-n * up // down)
+
+
+class StreamingResampler:
+    """Chunked, stateful ``scipy.signal.resample_poly`` along axis 0.
+
+    ``process`` returns the output samples that depend only on the input
+    seen so far; ``flush`` returns the rest, treating the signal as zero
+    past its end as resample_poly does. Blocks may be ``(n,)`` or
+    ``(n, channels)`` and of any length. Float input keeps its dtype,
+    integer input is resampled in float64.
+    """
+
+    def __init__(self, up, down, window=("kaiser", 5.0)):
+        g = math.gcd(up, down)
+        self.up, self.down = up // g, down // g
+        max_rate = max(self.up, self.down)
+        if max_rate == 1:
+            # equal rates: a one-tap filter passes the samples through as floats
+            self.half_len, self.h = 0, np.ones(1)
+        else:
+            self.half_len = 10 * max_rate
+            self.h = scipy.signal.firwin(2 * self.half_len + 1, 1.0 / max_rate,
+                                         window=window) * self.up
+        # Output n is sum_j h[j] * xu[n*down + half_len - j], where xu is the
+        # input upsampled by `up`. upfirdn over a buffer whose first sample
+        # is input index `start` computes exactly these sums when
+        # start*up - half_len is a multiple of `down`, with output m being
+        # n = m + (start*up - half_len) // down. The buffer starts with
+        # zeros standing for the signal before its beginning.
+        history = -(-len(self.h) // self.up)
+        inverse = pow(self.up, -1, self.down) if self.down > 1 else 0
+        first = self.half_len * inverse % self.down
+        self._start = first - self.down * -(-(first + history) // self.down)
+        self._buffer = None
+        self._n_in = 0
+        self._n_out = 0
+
+    def process(self, block):
+        block = np.asarray(block)
+        if self._buffer is None:
+            dtype = block.dtype if np.issubdtype(block.dtype, np.floating) else np.float64
+            self.h = self.h.astype(dtype)
+            self._buffer = np.zeros((-self._start,) + block.shape[1:], dtype=dtype)
+        self._buffer = np.concatenate([self._buffer, block.astype(self._buffer.dtype, copy=False)])
+        self._n_in += len(block)
+        # outputs whose newest input sample, (n*down + half_len) // up, has arrived
+        return self._emit(-((self.half_len - self._n_in * self.up) // self.down))
+
+    def flush(self):
+        if self._buffer is None:
+            return np.zeros(0)
+        total = resampled_length(self._n_in, self.up, self.down)
+        if total > self._n_out:
+            # zeros past the end, up to the newest input of the last output
+            end = ((total - 1) * self.down + self.half_len) // self.up + 1
+            pad = end - (self._start + len(self._buffer))
+            if pad > 0:
+                self._buffer = np.concatenate(
+                    [self._buffer, np.zeros((pad,) + self._buffer.shape[1:], self._buffer.dtype)])
+        return self._emit(total)
+
+    def _emit(self, n_end):
+        buffer = self._buffer
+        if n_end <= self._n_out:
+            return buffer[:0].copy()
+        offset = (self._start * self.up - self.half_len) // self.down
+        out = scipy.signal.upfirdn(self.h, buffer, self.up, self.down, axis=0)
+        out = out[self._n_out - offset:n_end - offset]
+        self._n_out = n_end
+        # keep the history the next output needs, dropping whole multiples
+        # of `down` samples so the start stays aligned
+        keep_from = (n_end * self.down + self.half_len - len(self.h) + 1) // self.up
+        drop = max(keep_from - self._start, 0) // self.down * self.down
+        if drop:
+            self._buffer = buffer[drop:]
+            self._start += drop
+        return out
+
+    def stream(self, blocks):
+        """Resample an iterable of blocks, yielding output as it is ready."""
+        for block in blocks:
+            out = self.process(block)
+            if len(out):
+                yield out
+        out = self.flush()
+        if len(out):
+            yield out
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+TEMP_SUFFIX = ".part"
+
+
+def result_key(*parts):
+    """Deterministic hex key for a result described by ``parts``."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """Content-addressed files on disk with a byte quota and LRU eviction.
+
+    Results are stored as ``<root>/<name>`` where the name is derived from a
+    result_key, so identical requests find the same file. Reads refresh the
+    file's mtime and eviction removes the least recently used files first.
+    All state is on disk, so several processes (e.g. the job workers) can
+    share one cache directory; writes go to a temporary file that is renamed
+    into place.
+    """
+
+    def __init__(self, root, url, max_bytes):
+        self.root = str(root)
+        self.url_prefix = url
+        self.max_bytes = int(max_bytes)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def url(self, name):
+        return f"{self.url_prefix}{name}"
+
+    def lookup(self, name):
+        """Path of a cached result, or None; a hit counts as a use for LRU."""
+        path = self.path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def temp_path(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=self.root, suffix=TEMP_SUFFIX)
+        os.close(fd)
+        return path
+
+    def commit(self, name, temp_path):
+        """Move a finished temporary file into place and enforce the quota."""
+        path = self.path(name)
+        os.replace(temp_path, path)
+        self.evict(keep=name)
+        return path
+
+    def store(self, name, write):
+        """Produce a result with ``write(path)`` and cache it as ``name``."""
+        temp_path = self.temp_path()
+        try:
+            write(temp_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return self.commit(name, temp_path)
+
+    def get_json(self, name):
+        path = self.lookup(name)
+        if path is None:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def put_json(self, name, value):
+        def write(path):
+            with open(path, "w") as f:
+                json.dump(value, f)
+        self.store(name, write)
+        return value
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith(TEMP_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.name))
+        return entries
+
+    @property
+    def current_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep=None):
+        """Delete least recently used results until the quota is met."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            logging.info("Evicted cached result %s", name)
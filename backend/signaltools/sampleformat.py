@@ -0,0 +1,55 @@
+"""Conversion between WAV sample formats and floating point processing buffers.
+
+Integer PCM is scaled to [-1, 1) on the way in and scaled, rounded and
+clipped back on the way out, so a filtered file can be written in the same
+sample format as its source. Conversions reuse the freshly allocated buffer
+(``out=``) instead of chaining temporaries.
+"""
+import numpy as np
+
+
+def _int_scale(dtype):
+    # (offset, scale) mapping integer samples onto [-1, 1)
+    info = np.iinfo(dtype)
+    if dtype.kind == "u":
+        # unsigned PCM (8-bit WAV) is centred on its midpoint
+        offset = (int(info.max) + 1) // 2
+        return offset, float(offset)
+    return 0, float(-int(info.min))
+
+
+def to_float(samples, dtype=np.float32, source_dtype=None):
+    """Return ``samples`` as floats of ``dtype`` in [-1, 1).
+
+    ``source_dtype`` is the WAV sample format the values came from; it
+    defaults to ``samples.dtype`` and matters when the values were already
+    widened (e.g. a channel mix-down of int16 data). Float input of the
+    requested dtype is returned without copying.
+    """
+    dtype = np.dtype(dtype)
+    source_dtype = np.dtype(source_dtype or samples.dtype)
+    if source_dtype.kind == "f":
+        return np.asarray(samples).astype(dtype, copy=False)
+    offset, scale = _int_scale(source_dtype)
+    out = np.asarray(samples).astype(dtype)
+    if offset:
+        np.subtract(out, offset, out=out)
+    np.multiply(out, 1.0 / scale, out=out)
+    return out
+
+
+def from_float(samples, dtype):
+    """Convert [-1, 1) floats to the sample format ``dtype`` with clipping."""
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        return np.asarray(samples).astype(dtype, copy=False)
+    info = np.iinfo(dtype)
+    offset, scale = _int_scale(dtype)
+    # float32 cannot hold the 32-bit limits exactly, so clip those in float64
+    work = np.float64 if dtype.itemsize >= 4 else np.result_type(samples, np.float32)
+    out = np.multiply(samples, scale, dtype=work)
+    if offset:
+        np.add(out, offset, out=out)
+    np.rint(out, out=out)
+    np.clip(out, info.min, info.max, out=out)
+    return out.astype(dtype)
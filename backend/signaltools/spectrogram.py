@@ -0,0 +1,107 @@
+"""Short-time Fourier transform computed in tiles of frames.
+
+Frame ``i`` covers samples ``[i * hop, i * hop + n_fft)`` (zero-padded past
+the end of the signal). Frames are grouped into tiles of ``TILE_FRAMES`` so
+a viewport only needs the tiles it overlaps, and each tile is computed in
+chunks with ``rfft`` so memory stays bounded by the chunk, not the file.
+Magnitudes are stored as dB relative to full scale, quantized to uint8.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import scipy.signal
+
+from signaltools.sampleformat import to_float
+
+SPECTROGRAM_WINDOWS = ("hann", "hamming", "blackman", "boxcar")
+TILE_FRAMES = 256
+MIN_FFT_SIZE = 16
+MAX_FFT_SIZE = 16384
+# frames transformed per rfft call while computing a tile
+CHUNK_FRAMES = 64
+
+
+@dataclass(frozen=True)
+class SpectrogramParams:
+    n_fft: int = 1024
+    hop: int = 256
+    window: str = "hann"
+    # None is the mono mix-down
+    channel: Optional[int] = None
+    # dB range mapped onto 0..255; 0 dBFS is the top of the range
+    db_range: float = 100.0
+
+    def __post_init__(self):
+        if not MIN_FFT_SIZE <= self.n_fft <= MAX_FFT_SIZE:
+            raise ValueError(f"n_fft must be between {MIN_FFT_SIZE} and {MAX_FFT_SIZE}")
+        if not 1 <= self.hop <= self.n_fft:
+            raise ValueError("hop must be between 1 and n_fft")
+        if self.window not in SPECTROGRAM_WINDOWS:
+            raise ValueError(f"window must be one of {SPECTROGRAM_WINDOWS}")
+        if not self.db_range > 0:
+            raise ValueError("db_range must be positive")
+
+    @property
+    def n_bins(self):
+        return self.n_fft // 2 + 1
+
+    def n_frames(self, n_samples):
+        return max(-(-n_samples // self.hop), 1)
+
+    def n_tiles(self, n_samples):
+        return -(-self.n_frames(n_samples) // TILE_FRAMES)
+
+    @property
+    def tile_nbytes(self):
+        return TILE_FRAMES * self.n_bins
+
+
+def _window(params):
+    # scaled so a full-scale sine reads 0 dB
+    window = scipy.signal.get_window(params.window, params.n_fft).astype(np.float32)
+    return window * np.float32(2.0 / window.sum())
+
+
+def _frame_samples(y, params, first_frame, n_frames):
+    # Samples under frames [first_frame, first_frame + n_frames) as floats,
+    # mixed down or reduced to one channel and zero-padded past the end
+    start = first_frame * params.hop
+    stop = (first_frame + n_frames - 1) * params.hop + params.n_fft
+    block = np.asarray(y[start:min(stop, len(y))])
+    if block.ndim > 1:
+        block = block.mean(axis=1) if params.channel is None else block[:, params.channel]
+    block = to_float(block, np.float32, source_dtype=y.dtype)
+    if len(block) < stop - start:
+        block = np.concatenate([block, np.zeros(stop - start - len(block), np.float32)])
+    return block
+
+
+def quantize_db(magnitude, db_range):
+    """Map linear magnitudes onto uint8, 255 at 0 dBFS and 0 at -db_range."""
+    db = 20 * np.log10(np.maximum(magnitude, 1e-12))
+    scaled = (db + db_range) * (255.0 / db_range)
+    return np.clip(np.rint(scaled), 0, 255).astype(np.uint8)
+
+
+def spectrogram_tile(y, params, tile_index):
+    """Quantized magnitude STFT of one tile as a ``(frames, n_bins)`` uint8 array.
+
+    The last tile may have fewer than TILE_FRAMES frames. Raises IndexError
+    for a tile beyond the end of the signal.
+    """
+    total = params.n_frames(len(y))
+    first = tile_index * TILE_FRAMES
+    if tile_index < 0 or first >= total:
+        raise IndexError(f"Tile {tile_index} out of range for {params.n_tiles(len(y))} tiles")
+    n_frames = min(TILE_FRAMES, total - first)
+    window = _window(params)
+    tile = np.empty((n_frames, params.n_bins), dtype=np.uint8)
+    for offset in range(0, n_frames, CHUNK_FRAMES):
+        count = min(CHUNK_FRAMES, n_frames - offset)
+        samples = _frame_samples(y, params, first + offset, count)
+        frames = np.lib.stride_tricks.sliding_window_view(
+            samples, params.n_fft)[::params.hop][:count]
+        spectrum = np.fft.rfft(frames * window, axis=-1)
+        tile[offset:offset + count] = quantize_db(np.abs(spectrum), params.db_range)
+    return tile
@@ -0,0 +1,63 @@
+"""One-sided magnitude spectra of real signals.
+
+Both methods return amplitudes scaled so a sine of amplitude A peaks at
+about A, which makes plain and Welch-averaged spectra comparable.
+"""
+import numpy as np
+import scipy.fft
+import scipy.signal
+
+SPECTRUM_METHODS = ("rfft", "welch")
+SPECTRUM_SCALES = ("linear", "db")
+DEFAULT_SEGMENT = 4096
+# segments transformed per rfft call by the Welch estimate
+CHUNK_SEGMENTS = 64
+
+
+def rfft_spectrum(x, sr):
+    """Magnitude of the real FFT of ``x``, zero-padded to a fast length.
+
+    Only the ``n // 2 + 1`` non-negative frequencies are computed, in the
+    input's precision (float32 input stays complex64).
+    """
+    n = scipy.fft.next_fast_len(max(len(x), 1), real=True)
+    spectrum = np.abs(scipy.fft.rfft(x, n))
+    spectrum *= 2.0 / max(len(x), 1)
+    return np.fft.rfftfreq(n, 1 / sr), spectrum
+
+
+def welch_spectrum(x, sr, nperseg=DEFAULT_SEGMENT):
+    """Welch-averaged magnitude spectrum with half-overlapping Hann segments.
+
+    Segments are transformed a chunk at a time, so memory is bounded by
+    ``CHUNK_SEGMENTS * nperseg`` whatever the length of ``x``.
+    """
+    nperseg = max(min(int(nperseg), len(x)), 1)
+    hop = max(nperseg // 2, 1)
+    window = scipy.signal.get_window("hann", nperseg).astype(np.float32)
+    scale = 2.0 / window.sum()
+    n_segments = (len(x) - nperseg) // hop + 1
+    power = np.zeros(nperseg // 2 + 1)
+    for first in range(0, n_segments, CHUNK_SEGMENTS):
+        count = min(CHUNK_SEGMENTS, n_segments - first)
+        block = np.asarray(x[first * hop:(first + count - 1) * hop + nperseg])
+        segments = np.lib.stride_tricks.sliding_window_view(block, nperseg)[::hop]
+        segments = segments - segments.mean(axis=1, keepdims=True)
+        magnitude = np.abs(scipy.fft.rfft(segments * window, axis=-1))
+        power += np.square(magnitude * scale).sum(axis=0)
+    return np.fft.rfftfreq(nperseg, 1 / sr), np.sqrt(power / max(n_segments, 1))
+
+
+def magnitude_spectrum(x, sr, method="rfft", nperseg=DEFAULT_SEGMENT, scale="linear"):
+    """``(frequencies in Hz, magnitudes)`` of a 1-D signal."""
+    if method not in SPECTRUM_METHODS:
+        raise ValueError(f"method must be one of {SPECTRUM_METHODS}")
+    if scale not in SPECTRUM_SCALES:
+        raise ValueError(f"scale must be one of {SPECTRUM_SCALES}")
+    if method == "welch":
+        freqs, magnitude = welch_spectrum(x, sr, nperseg)
+    else:
+        freqs, magnitude = rfft_spectrum(x, sr)
+    if scale == "db":
+        magnitude = 20 * np.log10(np.maximum(magnitude, 1e-12))
+    return freqs, magnitude
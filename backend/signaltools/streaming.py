@@ -0,0 +1,167 @@
+import struct
+
+import numpy as np
+import scipy.signal
+
+from signaltools.resample import StreamingResampler, rate_factors, resampled_length
+from signaltools.sampleformat import from_float, to_float
+from signaltools.wavinfo import WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM
+
+DEFAULT_BLOCK_SIZE = 65536
+MAX_CHUNK_SIZE = 0xFFFFFFFF
+
+
+def iter_blocks(y, block_size=DEFAULT_BLOCK_SIZE):
+    # Slicing a memmap only touches the pages of the current block
+    for start in range(0, len(y), block_size):
+        yield y[start:start + block_size]
+
+
+def stream_sosfilt(sos, blocks, zi=None):
+    """Filter an iterable of time blocks, carrying the SOS state between them.
+
+    Blocks are filtered along axis 0, so ``(n,)`` and ``(n, channels)`` input
+    both work. The concatenated output is identical to a single
+    ``sosfilt(sos, y, axis=0)`` call over the whole signal; float32 ``sos``
+    and float32 blocks are filtered in float32.
+    """
+    for block in blocks:
+        if zi is None:
+            zi = np.zeros((sos.shape[0], 2) + block.shape[1:],
+                          dtype=np.result_type(sos, block))
+        out, zi = scipy.signal.sosfilt(sos, block, axis=0, zi=zi)
+        yield out
+
+
+def wav_header(sr, channels, dtype, n_frames):
+    """RIFF/WAVE header for ``n_frames`` frames, laid out like scipy's writer."""
+    dtype = np.dtype(dtype)
+    kind = dtype.kind
+    if kind not in "iuf":
+        raise ValueError(f"Unsupported WAV sample type: {dtype}")
+    is_pcm = kind in "iu"
+    bits = dtype.itemsize * 8
+    block_align = channels * dtype.itemsize
+    data_size = min(n_frames * block_align, MAX_CHUNK_SIZE)
+    fmt = struct.pack("<HHIIHH",
+                      WAVE_FORMAT_PCM if is_pcm else WAVE_FORMAT_IEEE_FLOAT,
+                      channels, sr, sr * block_align, block_align, bits)
+    if not is_pcm:
+        # cbSize for non-PCM formats
+        fmt += b"\x00\x00"
+    chunks = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    if not is_pcm:
+        chunks += b"fact" + struct.pack("<II", 4, n_frames)
+    chunks += b"data" + struct.pack("<I", data_size)
+    riff_size = min(len(chunks) + n_frames * block_align, MAX_CHUNK_SIZE)
+    return b"RIFF" + struct.pack("<I", riff_size) + chunks
+
+
+class WavWriter:
+    """Incremental WAV writer: the header is patched with the sizes on close.
+
+    Produces the same layout as ``scipy.io.wavfile.write`` for the given dtype.
+    """
+
+    def __init__(self, filename, sr, channels, dtype):
+        self.filename = filename
+        self.sr = int(sr)
+        self.channels = int(channels)
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.frames = 0
+        self._file = open(filename, "wb")
+        self._file.write(self._header(0))
+        self._data_offset = self._file.tell()
+
+    def _header(self, n_frames):
+        return wav_header(self.sr, self.channels, self.dtype, n_frames)
+
+    def write(self, block):
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        self._file.write(block.tobytes())
+        self.frames += len(block)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(self._header(self.frames))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _rates(sr, sample_rate):
+    # (up, down) converting sr to sample_rate, or None to keep sr
+    if sample_rate is None or int(sample_rate) == int(sr):
+        return None
+    return rate_factors(sr, sample_rate)
+
+
+def filter_to_wav(spec, y, sr, output_filename, block_size=DEFAULT_BLOCK_SIZE,
+                  precision=None, out_dtype=np.float64, sample_rate=None):
+    """Filter ``y`` with a FilterSpec block by block straight into a WAV file.
+
+    With ``precision`` set, each block is scaled to floats of that dtype
+    before filtering and the result is written as ``out_dtype`` (e.g. the
+    source's int16) with clipping; otherwise raw samples are filtered in
+    float64. With ``sample_rate`` the filtered blocks are resampled to it
+    before they are written; ``spec=None`` only resamples. Peak memory is
+    bounded by ``block_size``, not the signal length.
+    """
+    channels = y.shape[1] if y.ndim > 1 else 1
+    rates = _rates(sr, sample_rate)
+    with WavWriter(output_filename, sample_rate or sr, channels, out_dtype) as writer:
+        for block in iter_filtered_blocks(spec, y, block_size, precision, out_dtype, rates):
+            writer.write(block)
+    return output_filename
+
+
+def iter_filtered_blocks(spec, y, block_size=DEFAULT_BLOCK_SIZE, precision=None,
+                         out_dtype=np.float64, rates=None):
+    # Filtered (and with rates=(up, down), resampled) blocks of y converted
+    # to out_dtype; see filter_to_wav
+    out_dtype = np.dtype(out_dtype)
+    blocks = iter_blocks(y, block_size)
+    if precision is not None:
+        blocks = (to_float(block, precision) for block in blocks)
+    if spec is not None:
+        blocks = spec.stream(blocks, precision)
+    if rates is not None:
+        blocks = StreamingResampler(*rates).stream(blocks)
+    for block in blocks:
+        if precision is not None:
+            block = from_float(block, out_dtype)
+        yield np.ascontiguousarray(block, dtype=out_dtype.newbyteorder("<"))
+
+
+def iter_filtered_wav(spec, y, sr, block_size=DEFAULT_BLOCK_SIZE, precision=None,
+                      out_dtype=np.float64, sample_rate=None):
+    """WAV file bytes of the filtered signal, produced block by block.
+
+    The output length is known from the input length (and the output
+    sample rate), so the header is complete up front and the bytes can be
+    sent while later blocks are still being filtered. Yields the header
+    first, then one chunk per block.
+    """
+    channels = y.shape[1] if y.ndim > 1 else 1
+    rates = _rates(sr, sample_rate)
+    n_frames = len(y) if rates is None else resampled_length(len(y), *rates)
+    yield wav_header(int(sample_rate or sr), channels, np.dtype(out_dtype).newbyteorder("<"),
+                     n_frames)
+    for block in iter_filtered_blocks(spec, y, block_size, precision, out_dtype, rates):
+        yield block.tobytes()
+
+
+def filtered_wav_size(y, out_dtype=np.float64, sr=None, sample_rate=None):
+    # Byte length of the file iter_filtered_wav produces for y
+    channels = y.shape[1] if y.ndim > 1 else 1
+    out_dtype = np.dtype(out_dtype)
+    rates = None if sr is None else _rates(sr, sample_rate)
+    n_frames = len(y) if rates is None else resampled_length(len(y), *rates)
+    header = wav_header(1, channels, out_dtype, n_frames)
+    return len(header) + n_frames * channels * out_dtype.itemsize
@@ -0,0 +1,122 @@
+"""Evaluate many filter designs side by side.
+
+Frequency responses of all designs are computed together on one shared
+grid: Butterworth sections are padded to a common count and evaluated as one
+array expression, FIR taps with one batched rfft. The time-domain metrics,
+which filter the audio, run on a thread pool; sosfilt, lfilter and the FFTs
+release the GIL, so they use several cores while sharing the samples.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# identity second-order section used to pad shorter designs
+_IDENTITY_SECTION = np.array([1.0, 0.0, 0.0, 1.0, 0.0, 0.0])
+DEFAULT_WORN = 512
+
+
+def _sos_responses(sos_list, w):
+    n_sections = max(len(sos) for sos in sos_list)
+    stacked = np.tile(_IDENTITY_SECTION, (len(sos_list), n_sections, 1))
+    for i, sos in enumerate(sos_list):
+        stacked[i, :len(sos)] = sos
+    z = np.exp(-1j * w)
+    powers = np.stack([np.ones_like(z), z, z * z])
+    # (designs, sections, frequencies)
+    numerator = stacked[..., :3] @ powers
+    denominator = stacked[..., 3:] @ powers
+    return np.prod(numerator / denominator, axis=1)
+
+
+def _fir_responses(taps_list, worN):
+    # freqz's grid (worN points on [0, pi)) is every k-th bin of an rfft
+    # long enough to hold the longest filter
+    length = max(len(taps) for taps in taps_list)
+    step = -(-length // (2 * worN))
+    stacked = np.zeros((len(taps_list), length))
+    for i, taps in enumerate(taps_list):
+        stacked[i, :len(taps)] = taps
+    return np.fft.rfft(stacked, n=2 * worN * step, axis=1)[:, ::step][:, :worN]
+
+
+def frequency_responses(specs, worN=DEFAULT_WORN):
+    """``(frequencies in Hz, responses)`` of specs sharing one sample rate.
+
+    ``responses`` is a ``(len(specs), worN)`` complex array, each row equal
+    to that spec's ``frequency_response(worN)``.
+    """
+    sr = specs[0].sr
+    if any(spec.sr != sr for spec in specs):
+        raise ValueError("All filters in a sweep must share one sample rate")
+    w = np.pi * np.arange(worN) / worN
+    h = np.empty((len(specs), worN), dtype=complex)
+    iir = [i for i, spec in enumerate(specs) if not spec.is_fir]
+    fir = [i for i, spec in enumerate(specs) if spec.is_fir]
+    if iir:
+        h[iir] = _sos_responses([specs[i].sos for i in iir], w)
+    if fir:
+        h[fir] = _fir_responses([specs[i].taps for i in fir], worN)
+    for i, spec in enumerate(specs):
+        if spec.phase != "zero":
+            continue
+        if spec.is_fir:
+            h[i] = (h[i] * np.exp(1j * w * ((len(spec.taps) - 1) // 2))).real
+        else:
+            h[i] = np.abs(h[i]) ** 2
+    return w * sr / (2 * np.pi), h
+
+
+def response_metrics(freqs, magnitude_db, spec):
+    """Summary of one magnitude response: peak, gain at the cutoffs and -3 dB edges."""
+    peak = float(magnitude_db.max())
+    cutoffs = spec.cutoff if isinstance(spec.cutoff, tuple) else (spec.cutoff,)
+    below = magnitude_db < peak - 3.0
+    crossings = np.nonzero(below[1:] != below[:-1])[0]
+    edges = []
+    for i in crossings:
+        # linear interpolation of the -3 dB point between the two bins
+        a, b = magnitude_db[i] - (peak - 3.0), magnitude_db[i + 1] - (peak - 3.0)
+        edges.append(float(freqs[i] + (freqs[i + 1] - freqs[i]) * a / (a - b)))
+    return {
+        "peak_gain_db": peak,
+        "gain_at_cutoff_db": [float(np.interp(c, freqs, magnitude_db)) for c in cutoffs],
+        "edges_3db_hz": edges,
+    }
+
+
+def time_domain_metrics(spec, x, block_size=65536):
+    """Impulse response length and output level of ``spec`` applied to ``x``.
+
+    The length spans the whole response, both sides of t=0 for zero-phase
+    filters. ``x`` is a 1-D float signal; it is filtered block by block so
+    the filtered copy is never held in full.
+    """
+    energy_in = float(np.dot(x, x))
+    energy_out = 0.0
+    blocks = (x[i:i + block_size] for i in range(0, len(x), block_size))
+    for block in spec.stream(blocks, x.dtype):
+        energy_out += float(np.dot(block, block))
+    times, _ = spec.impulse_response(max_length=10 * spec.sr)
+    return {
+        "impulse_length_s": float(times[-1] - times[0]) + 1 / spec.sr,
+        "output_level_db": float(10 * np.log10(max(energy_out, 1e-30) / max(energy_in, 1e-30))),
+    }
+
+
+def sweep(specs, x=None, worN=DEFAULT_WORN, workers=None):
+    """Frequency responses and metrics for every spec.
+
+    Returns ``(frequencies, magnitudes_db, metrics)`` with one metrics dict
+    per spec. Time-domain metrics are only computed when a signal ``x`` is
+    given.
+    """
+    freqs, h = frequency_responses(specs, worN)
+    magnitudes_db = 20 * np.log10(np.maximum(np.abs(h), 1e-12))
+    metrics = [response_metrics(freqs, magnitudes_db[i], spec)
+               for i, spec in enumerate(specs)]
+    if x is not None:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for result, timed in zip(metrics, pool.map(
+                    lambda spec: time_domain_metrics(spec, x), specs)):
+                result.update(timed)
+    return freqs, magnitudes_db, metrics
@@ -0,0 +1,170 @@
+import os
+import struct
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    sr: int
+    channels: int
+    bits_per_sample: int
+    format_tag: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def block_align(self):
+        return self.channels * (self.bits_per_sample // 8)
+
+    @property
+    def n_frames(self):
+        return self.data_size // self.block_align
+
+    @property
+    def duration(self):
+        return self.n_frames / self.sr
+
+    @property
+    def dtype(self):
+        # None when the samples cannot be mapped directly (e.g. 24-bit PCM)
+        if self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            return {32: np.dtype("<f4"), 64: np.dtype("<f8")}.get(self.bits_per_sample)
+        if self.format_tag == WAVE_FORMAT_PCM:
+            return {8: np.dtype("u1"), 16: np.dtype("<i2"),
+                    32: np.dtype("<i4"), 64: np.dtype("<i8")}.get(self.bits_per_sample)
+        return None
+
+
+def parse_fmt_chunk(payload):
+    # Returns (format_tag, channels, sr, bits_per_sample) from a 'fmt ' chunk
+    if len(payload) < 16:
+        raise ValueError("Truncated fmt chunk")
+    format_tag, channels, sr, _, _, bits = struct.unpack("<HHIIHH", payload[:16])
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(payload) >= 26:
+        # the real format is the first two bytes of the sub-format GUID
+        format_tag = struct.unpack("<H", payload[24:26])[0]
+    return format_tag, channels, sr, bits
+
+
+def read_wav_info(filename):
+    """Read the header of a RIFF/WAVE file without touching the sample data."""
+    file_size = os.path.getsize(filename)
+    with open(filename, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{filename} is not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"No data chunk found in {filename}")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = parse_fmt_chunk(f.read(chunk_size))
+                f.seek(chunk_size % 2, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"data chunk before fmt chunk in {filename}")
+                offset = f.tell()
+                # streamed writers may leave the size unset, so clamp to the file
+                size = min(chunk_size, file_size - offset)
+                format_tag, channels, sr, bits = fmt
+                return WavInfo(sr=sr, channels=channels, bits_per_sample=bits,
+                               format_tag=format_tag, data_offset=offset,
+                               data_size=size)
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+class WavStreamParser:
+    """Incremental RIFF/WAVE parser for a file arriving in pieces.
+
+    ``feed`` takes the file's bytes in order and returns the part of them that
+    belongs to the data chunk; ``info`` is set once the data chunk's header
+    has arrived. Chunks other than ``fmt `` and ``data`` are skipped without
+    being buffered.
+    """
+
+    def __init__(self):
+        self.info = None
+        self._buffer = bytearray()
+        # absolute file offset of _buffer[0]
+        self._offset = 0
+        # bytes of a skipped chunk that have not arrived yet
+        self._skip = 0
+        self._fmt = None
+        self._data_left = 0
+        self._data_received = 0
+
+    def feed(self, piece):
+        if self.info is None:
+            self._buffer += piece
+            piece = self._parse_header()
+            if self.info is None:
+                return b""
+        data = piece[:self._data_left]
+        self._data_left -= len(data)
+        self._data_received += len(data)
+        return data
+
+    def finish(self):
+        """Header of the complete file; the data size is clamped to what arrived."""
+        if self.info is None:
+            raise ValueError("No data chunk found")
+        if self._data_received < self.info.data_size:
+            # streamed writers may leave the size unset, as read_wav_info allows
+            self.info = replace(self.info, data_size=self._data_received)
+        return self.info
+
+    def _parse_header(self):
+        # Consumes complete header chunks from the buffer; returns the bytes
+        # following the data chunk header once it is found
+        buf = self._buffer
+        pos = 0
+        if self._offset == 0:
+            if len(buf) < 12:
+                return b""
+            riff, _, wave = struct.unpack("<4sI4s", buf[:12])
+            if riff != b"RIFF" or wave != b"WAVE":
+                raise ValueError("Not a RIFF/WAVE file")
+            pos = 12
+        while True:
+            if self._skip:
+                skipped = min(self._skip, len(buf) - pos)
+                pos += skipped
+                self._skip -= skipped
+                if self._skip:
+                    break
+            if len(buf) - pos < 8:
+                break
+            chunk_id, chunk_size = struct.unpack("<4sI", buf[pos:pos + 8])
+            if chunk_id == b"fmt ":
+                if len(buf) - pos < 8 + chunk_size:
+                    break
+                self._fmt = parse_fmt_chunk(bytes(buf[pos + 8:pos + 8 + chunk_size]))
+                pos += 8 + chunk_size
+                self._skip = chunk_size % 2
+            elif chunk_id == b"data":
+                if self._fmt is None:
+                    raise ValueError("data chunk before fmt chunk")
+                pos += 8
+                format_tag, channels, sr, bits = self._fmt
+                self.info = WavInfo(sr=sr, channels=channels, bits_per_sample=bits,
+                                    format_tag=format_tag, data_offset=self._offset + pos,
+                                    data_size=chunk_size)
+                self._data_left = chunk_size
+                rest = bytes(buf[pos:])
+                self._buffer = None
+                return rest
+            else:
+                pos += 8
+                self._skip = chunk_size + chunk_size % 2
+        del buf[:pos]
+        self._offset += pos
+        return b""
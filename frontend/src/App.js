@@ -41,9 +41,9 @@ function App() {
 
  const playAudio = async () => {
     try {
-        if (!file || isPlaying) return;
+        if (!metadata || isPlaying) return;
 
-        const data = await getAudioFile(file.name);
+        const data = await getAudioFile(metadata.audio_id);
         const audio = new Audio(data);
         audioRef.current = audio;
 
@@ -109,8 +109,8 @@ function App() {
 
   const handleFilter = async () => {
     try{
-      const data = await applyFilter(file,filterType,cutoff,order);
-      const plotData = await getPlotData(file,filterType,cutoff,order);
+      const data = await applyFilter(metadata.audio_id,filterType,cutoff,order);
+      const plotData = await getPlotData(metadata.audio_id,filterType,cutoff,order);
       setFrequencyResponseData(plotData["plot_data"]["filter_frequency_response"]);
       setTimeDomainResponseData(plotData["plot_data"]["filter_time_domain_response"]);
       setImpulsResponseData(plotData["plot_data"]["filter_impulse_response"]);
@@ -1,33 +1,39 @@
 import axios from "axios";
 import API_BASE from "./config";
 
-export const uploadAudio = async (file) => {
+// previewWidth > 0 also returns a waveform overview of that many points
+export const uploadAudio = async (file, previewWidth = 0) => {
     const formData = new FormData();
     formData.append("file", file);
+    if (previewWidth) formData.append("preview_width", previewWidth);
     const response = await axios.post(`${API_BASE}/upload/`, formData);
     return response.data;
 };
   
-export const applyFilter = async (file, filterType, cutoff, order) => {
+// sampleRate: optional lower rate for the exported file
+export const applyFilter = async (audioId, filterType, cutoff, order, design = "butter", phase = "causal", sampleRate = null) => {
     const formData = new FormData();
-    formData.append("file", file);
+    formData.append("audio_id", audioId);
     formData.append("filter_type", filterType);
     formData.append("cutoff", cutoff);
     formData.append("order", order);
+    formData.append("design", design);
+    formData.append("phase", phase);
+    if (sampleRate) formData.append("sample_rate", sampleRate);
     const response = await axios.post(`${API_BASE}/filter/`, formData);
     return response.data;
 };
 
-export const getWaveformPlot = async (file) => {
+export const getWaveformPlot = async (audioId) => {
     const formData = new FormData();
-    formData.append("file", file);
+    formData.append("audio_id", audioId);
     const response = await axios.post(`${API_BASE}/plot_waveform/`, formData);
     return response.data;
 };
 
-export const getAudioFile = async (fileName) => {
+export const getAudioFile = async (audioId) => {
     try {
-      const response = await axios.get(`${API_BASE}/get_audio/?filename=${fileName}`, {
+      const response = await axios.get(`${API_BASE}/get_audio/?audio_id=${audioId}`, {
         responseType: 'blob',
       });
       const audioUrl = URL.createObjectURL(response.data);
@@ -38,16 +44,111 @@ export const getAudioFile = async (fileName) => {
   };
 
 
-export const getPlotData = async (file, filterType, cutoff, order) => {
+// sampleRate: optional preview rate for the time-domain plot
+export const getPlotData = async (audioId, filterType, cutoff, order, design = "butter", phase = "causal", sampleRate = null) => {
   try{  
     const formData = new FormData();
-    formData.append("file", file);
+    formData.append("audio_id", audioId);
     formData.append("filter_type", filterType);
     formData.append("cutoff", cutoff);
     formData.append("order", order);
+    formData.append("design", design);
+    formData.append("phase", phase);
+    if (sampleRate) formData.append("sample_rate", sampleRate);
     const response = await axios.post(`${API_BASE}/get_plot_data/`, formData);
     return response.data;
   } catch (error){
     console.log(error);
   }
-}
\ No newline at end of file
+}
+
+export const getWaveformWindow = async (audioId, start, end, width) => {
+  try{
+    const params = new URLSearchParams({audio_id: audioId, start, end, width});
+    const response = await axios.get(`${API_BASE}/waveform_window/?${params}`);
+    return response.data;
+  } catch (error){
+    console.log(error);
+  }
+}
+
+export const getSpectrogramTiles = async (audioId, start, end, nFft = 1024, hop = 256, window = "hann") => {
+  try{
+    const params = new URLSearchParams({audio_id: audioId, start, end, n_fft: nFft, hop, window});
+    const response = await axios.get(`${API_BASE}/spectrogram/?${params}`);
+    return response.data;
+  } catch (error){
+    console.log(error);
+  }
+}
+
+export const getSpectrum = async (audioId, method = "rfft", scale = "db", nperseg = 4096) => {
+  try{
+    const formData = new FormData();
+    formData.append("audio_id", audioId);
+    formData.append("method", method);
+    formData.append("scale", scale);
+    formData.append("nperseg", nperseg);
+    const response = await axios.post(`${API_BASE}/spectrum/`, formData);
+    return response.data;
+  } catch (error){
+    console.log(error);
+  }
+}
+
+// Streamed while it is filtered; usable directly as an <audio> src
+export const getFilteredAudioUrl = (audioId, filterType, cutoff, order, design = "butter", phase = "causal") => {
+  const params = new URLSearchParams({audio_id: audioId, filter_type: filterType, cutoff, order, design, phase});
+  return `${API_BASE}/filtered_audio/?${params}`;
+}
+
+// grid: e.g. {filter_type: "low", order: [2, 4, 8], cutoff: [500, 1000, 2000]}
+export const runFilterSweep = async (audioId, grid) => {
+  try{
+    const response = await axios.post(`${API_BASE}/sweep/`, {audio_id: audioId, grid});
+    return response.data;
+  } catch (error){
+    console.log(error);
+  }
+}
+
+// params: {filter_type, cutoff, order, design, phase}; returns {session_id, generation}
+export const openLiveSession = async (audioId, params, maxPoints = 2000) => {
+  try{
+    const response = await axios.post(`${API_BASE}/live/`, {audio_id: audioId, max_points: maxPoints, ...params});
+    return response.data;
+  } catch (error){
+    console.log(error);
+  }
+}
+
+export const updateLiveSession = async (sessionId, params) => {
+  try{
+    const response = await axios.post(`${API_BASE}/live/${sessionId}/params/`, params);
+    return response.data;
+  } catch (error){
+    console.log(error);
+  }
+}
+
+// onEvent(type, data) gets "preview" and "result" plot updates, then "failed" or "close"
+export const liveSessionEvents = (sessionId, onEvent) => {
+  const source = new EventSource(`${API_BASE}/live/${sessionId}/events/`);
+  for (const type of ["preview", "result", "failed", "close"]){
+    source.addEventListener(type, (event) => {
+      onEvent(type, JSON.parse(event.data));
+      if (type === "close") source.close();
+    });
+  }
+  // connection errors carry no data; EventSource reconnects by itself
+  source.onerror = (error) => console.log(error);
+  return source;
+}
+
+export const closeLiveSession = async (sessionId) => {
+  try{
+    await axios.delete(`${API_BASE}/live/${sessionId}/`);
+  } catch (error){
+    console.log(error);
+  }
+}